@@ -1,13 +1,18 @@
 # app.py
 import hashlib
 import os
+import time
 from pathlib import Path
 
 import streamlit as st
 
-from ats_resume_optimizer.agent import optimize_resume, export_resume_pdf
+from ats_resume_optimizer.agent import optimize_resume, export_resume_pdf_bytes
 from ats_resume_optimizer.config import RESUME_DIR, OUTPUT_DIR
+from ats_resume_optimizer.llm import STOP_REASONS
 from ats_resume_optimizer.templates import TEMPLATES, get_template_choices, render_resume
+from ats_resume_optimizer.text_export import TEXT_FORMATS, render_text
+from ats_resume_optimizer.thumbnails import SAMPLE_CONTENT_HTML, get_thumbnails
+from ats_resume_optimizer.utils import build_output_path
 
 st.set_page_config(
     page_title="ATS Resume Optimizer", page_icon="📄", layout="centered"
@@ -29,6 +34,22 @@ def _cleanup_uploaded_resume():
     (RESUME_DIR / "uploaded_resume.pdf").unlink(missing_ok=True)
 
 
+def _format_pdf_report(report: dict) -> str:
+    before = report["original_bytes"] / 1024
+    after = report["optimized_bytes"] / 1024
+    return f"PDF compressed: {before:.0f} KB → {after:.0f} KB"
+
+
+def _format_usage(usage: dict) -> str:
+    cost = f" · ~${usage['cost_usd']:.4f}" if usage["cost_usd"] is not None else ""
+    return (
+        f"LLM usage: {usage['calls']} calls · {usage['input_tokens']:,} input "
+        f"({usage['cached_tokens']:,} cached, {usage['cached_ratio']:.0%}) / "
+        f"{usage['output_tokens']:,} "
+        f"output tokens · {usage['latency_s']:.1f}s{cost}"
+    )
+
+
 if "_session_initialized" not in st.session_state:
     _cleanup_generated_pdfs()
     _cleanup_uploaded_resume()
@@ -53,6 +74,23 @@ max_iterations = st.sidebar.number_input(
     "Max optimization iterations", min_value=1, max_value=10, value=5, step=1
 )
 
+candidates = st.sidebar.number_input(
+    "Parallel drafts per iteration",
+    min_value=1,
+    max_value=4,
+    value=1,
+    step=1,
+    help="Generate several drafts at once each iteration and keep the best. "
+    "Usually reaches the target in fewer rounds, at the cost of more tokens.",
+)
+
+compress_pdf = st.sidebar.checkbox(
+    "Compress PDF",
+    value=False,
+    help="Shrink the exported PDF (recompressed streams, deduplicated fonts "
+    "and objects, no toolchain metadata) for email and ATS upload limits.",
+)
+
 st.sidebar.divider()
 
 uploaded_resume = st.sidebar.file_uploader("Upload base resume PDF", type=["pdf"])
@@ -180,96 +218,6 @@ st.markdown("### 🎨 Resume Style")
 template_choices = get_template_choices()
 template_labels = {t[1]: t[0] for t in template_choices}
 
-_PREVIEW_CONTENT_HTML = """\
-<div class="resume-header">
-    <h1>Alexandra Chen</h1>
-    <div class="contact-info">
-        <span>alex.chen@email.com</span>
-        <span>(415) 987-6543</span>
-        <span>San Francisco, CA</span>
-        <span>linkedin.com/in/alexandrachen</span>
-    </div>
-</div>
-<div class="resume-section summary">
-    <h2>Professional Summary</h2>
-    <p>Results-driven Senior Software Engineer with 8+ years of experience building \
-scalable cloud-native applications. Proven track record of leading cross-functional \
-teams and delivering high-impact products that serve millions of users.</p>
-</div>
-<div class="resume-section skills">
-    <h2>Technical Skills</h2>
-    <div class="skills-grid">
-        <div class="skill-category">
-            <strong>Languages:</strong>
-            <span class="skill-tag">Python</span>
-            <span class="skill-tag">TypeScript</span>
-            <span class="skill-tag">Go</span>
-            <span class="skill-tag">SQL</span>
-        </div>
-        <div class="skill-category">
-            <strong>Frameworks:</strong>
-            <span class="skill-tag">React</span>
-            <span class="skill-tag">FastAPI</span>
-            <span class="skill-tag">Next.js</span>
-            <span class="skill-tag">Django</span>
-        </div>
-        <div class="skill-category">
-            <strong>Cloud & DevOps:</strong>
-            <span class="skill-tag">AWS</span>
-            <span class="skill-tag">Docker</span>
-            <span class="skill-tag">Kubernetes</span>
-            <span class="skill-tag">Terraform</span>
-        </div>
-    </div>
-</div>
-<div class="resume-section experience">
-    <h2>Professional Experience</h2>
-    <div class="experience-item">
-        <div class="item-header">
-            <h3>Senior Software Engineer</h3>
-            <span class="date">Jan 2022 – Present</span>
-        </div>
-        <div class="company">Stripe · San Francisco, CA</div>
-        <ul>
-            <li>Led architecture redesign of payment processing pipeline, reducing \
-latency by 40% and handling 2M+ daily transactions.</li>
-            <li>Mentored a team of 5 engineers and established code review standards \
-that cut production bugs by 30%.</li>
-        </ul>
-    </div>
-    <div class="experience-item">
-        <div class="item-header">
-            <h3>Software Engineer</h3>
-            <span class="date">Jun 2019 – Dec 2021</span>
-        </div>
-        <div class="company">Airbnb · San Francisco, CA</div>
-        <ul>
-            <li>Built real-time search ranking service using ML models, improving \
-booking conversion by 18%.</li>
-            <li>Designed and deployed microservices architecture serving 50M+ monthly \
-active users.</li>
-        </ul>
-    </div>
-</div>
-<div class="resume-section education">
-    <h2>Education</h2>
-    <div class="education-item">
-        <div class="item-header">
-            <h3>M.S. Computer Science</h3>
-            <span class="date">2017 – 2019</span>
-        </div>
-        <div class="company">Stanford University · Stanford, CA</div>
-    </div>
-</div>
-<div class="resume-section certifications">
-    <h2>Certifications</h2>
-    <ul class="cert-list">
-        <li><strong>AWS Solutions Architect Professional</strong> – Amazon (2023)</li>
-        <li><strong>Certified Kubernetes Administrator</strong> – CNCF (2022)</li>
-    </ul>
-</div>
-"""
-
 
 @st.dialog("Theme Preview", width="large")
 def _show_theme_preview(template_id: str, color: str):
@@ -277,7 +225,7 @@ def _show_theme_preview(template_id: str, color: str):
 
     meta = TEMPLATES[template_id]
     st.caption(f"**{meta['name']}** — {meta['description']}")
-    full_html = render_resume(template_id, _PREVIEW_CONTENT_HTML, color)
+    full_html = render_resume(template_id, SAMPLE_CONTENT_HTML, color)
     doc_style = """
     <style>
         html { background: #f0f0f0; }
@@ -295,19 +243,28 @@ def _show_theme_preview(template_id: str, color: str):
     components.html(full_html, height=700, scrolling=True)
 
 
-col_theme, col_color, col_preview = st.columns([3, 1, 0.4])
+col_theme, col_color, col_pages, col_preview = st.columns([3, 1, 1, 0.4])
 
 with col_theme:
     selected_label = st.selectbox(
         "Theme",
         options=list(template_labels.keys()),
         help="Choose a premium resume layout style",
+        key="theme_select",
     )
     selected_template_id = template_labels[selected_label]
 
 with col_color:
     primary_color = st.color_picker("Accent color", value="#2563eb")
 
+with col_pages:
+    page_limit_label = st.selectbox(
+        "Page limit",
+        options=["No limit", "1 page", "2 pages"],
+        help="Scale the resume down slightly so it fits this many pages",
+    )
+    max_pages = {"1 page": 1, "2 pages": 2}.get(page_limit_label)
+
 with col_preview:
     st.markdown("<div style='height: 26px'></div>", unsafe_allow_html=True)
     if st.button("👁️", help="Preview this theme with sample data", key="preview_btn"):
@@ -317,6 +274,41 @@ selected_meta = TEMPLATES[selected_template_id]
 st.caption(f"**{selected_meta['name']}** — {selected_meta['description']}")
 
 
+def _select_theme(label: str):
+    st.session_state["theme_select"] = label
+
+
+_GALLERY_COLUMNS = 4
+
+if st.toggle("🖼️ Browse all themes", help="Compare every theme side by side"):
+    gallery_content = SAMPLE_CONTENT_HTML
+    if st.session_state.get("_opt_content_html") and st.checkbox(
+        "Preview with my optimized resume"
+    ):
+        gallery_content = st.session_state["_opt_content_html"]
+    try:
+        with st.spinner("Rendering theme thumbnails…"):
+            thumbnails = get_thumbnails(primary_color, content_html=gallery_content)
+    except Exception as e:
+        st.warning(f"Theme gallery unavailable: {e}")
+    else:
+        gallery = list(template_labels.items())
+        for row in range(0, len(gallery), _GALLERY_COLUMNS):
+            for col, (label, tid) in zip(
+                st.columns(_GALLERY_COLUMNS), gallery[row:row + _GALLERY_COLUMNS]
+            ):
+                with col:
+                    st.image(thumbnails[tid], use_container_width=True)
+                    st.button(
+                        TEMPLATES[tid]["name"],
+                        key=f"gallery_{tid}",
+                        on_click=_select_theme,
+                        args=(label,),
+                        type="primary" if tid == selected_template_id else "secondary",
+                        use_container_width=True,
+                    )
+
+
 # ── Input fingerprinting for cache invalidation ─────────────────────────────
 
 def _compute_input_fingerprint() -> str:
@@ -330,6 +322,7 @@ def _compute_input_fingerprint() -> str:
         jd_url.strip(),
         str(target_score),
         str(max_iterations),
+        str(candidates),
     ]
     return hashlib.sha256("|".join(parts).encode()).hexdigest()
 
@@ -404,7 +397,8 @@ def _validate_common_inputs() -> str | None:
         st.error("Please provide at least a job URL or a job description.")
         return None
     key = api_key.strip() if api_key else None
-    if not key and not os.environ.get("OPENAI_API_KEY", "").strip():
+    offline = os.environ.get("ATS_LLM_BACKEND", "openai").lower() == "fake"
+    if not key and not offline and not os.environ.get("OPENAI_API_KEY", "").strip():
         st.error(
             "Please enter your OpenAI API key in the sidebar, "
             "or set OPENAI_API_KEY in a .env file."
@@ -413,6 +407,23 @@ def _validate_common_inputs() -> str | None:
     return key or ""
 
 
+def _show_text_downloads(content_html: str, job_title: str, company: str):
+    """Offer the optimized content as plain text, Markdown, and minimal HTML."""
+    st.caption("Paste-ready versions for ATS text fields (no browser needed):")
+    for col, (fmt, meta) in zip(st.columns(len(TEXT_FORMATS)), TEXT_FORMATS.items()):
+        with col:
+            st.download_button(
+                label=f"⬇️ {meta['label']}",
+                data=render_text(content_html, fmt),
+                file_name=build_output_path(
+                    job_title, company, suffix=meta["suffix"]
+                ).name,
+                mime=meta["mime"],
+                key=f"text_download_{fmt}",
+                use_container_width=True,
+            )
+
+
 results_area = st.empty()
 
 # ── Handle optimize / regenerate click → clear cache and rerun clean ─────────
@@ -477,6 +488,23 @@ if _optimizing:
                     f"({verification['must_have_found']}/{verification['must_have_total']})"
                 )
 
+        if data.get("input_tokens"):
+            score_parts.append(
+                f"Input tokens: {data['input_tokens']:,} "
+                f"({data['cached_tokens'] / data['input_tokens']:.0%} cached)"
+            )
+        if data.get("candidates"):
+            picked = next(
+                (c for c in data["candidates"] if c.get("selected")), None
+            )
+            if picked:
+                score_parts.append(
+                    f"Best of {len(data['candidates'])}: draft "
+                    f"#{picked['candidate'] + 1}"
+                )
+        if data.get("edited_blocks"):
+            score_parts.append(f"Edited: {', '.join(data['edited_blocks'])}")
+
         header = " &nbsp;|&nbsp; ".join(score_parts)
 
         if strategies:
@@ -507,8 +535,11 @@ if _optimizing:
             elif pending:
                 header += f"\n⬜ Missing: {', '.join(pending)}"
 
-        if score >= target_score:
+        stop_reason = data.get("stop_reason")
+        if stop_reason == "target":
             header += "\n\n🎯 **Target reached!**"
+        elif stop_reason:
+            header += f"\n\n🏁 **Stopped:** {STOP_REASONS[stop_reason]}"
 
         if changes_summary:
             header += f"\n\n> 📝 {changes_summary}"
@@ -517,9 +548,39 @@ if _optimizing:
         st.markdown(header)
         st.divider()
 
+    _LIVE_PREVIEW_INTERVAL = 0.5  # seconds between live preview redraws
+    _draft = {"iteration": 0, "html": "", "shown_at": 0.0}
+
+    def on_partial(event: dict) -> None:
+        import streamlit.components.v1 as components
+
+        if event["field"] != "tailored_resume_html":
+            return
+        if "value" in event:
+            live_preview.empty()
+            return
+        if event["iteration"] != _draft["iteration"]:
+            _draft.update(iteration=event["iteration"], html="")
+        _draft["html"] += event["delta"]
+        now = time.monotonic()
+        if now - _draft["shown_at"] < _LIVE_PREVIEW_INTERVAL:
+            return
+        _draft["shown_at"] = now
+        with live_preview.container():
+            st.caption(
+                f"✍️ Drafting iteration {event['iteration']}… "
+                f"{len(_draft['html']):,} characters"
+            )
+            components.html(
+                render_resume(selected_template_id, _draft["html"], primary_color),
+                height=400,
+                scrolling=True,
+            )
+
     with results_area.container():
         with st.status("Optimizing resume…", expanded=True) as status:
             _log_status("Starting optimization pipeline…")
+            live_preview = st.empty()
             try:
                 result = optimize_resume(
                     base_resume_pdf=base_resume_path,
@@ -531,48 +592,65 @@ if _optimizing:
                     api_key=api_key_to_use or None,
                     on_iteration=on_iteration,
                     on_status=_log_status,
+                    on_partial=on_partial,
+                    candidates=candidates,
+                    compact_context=True,
+                    section_edits=True,
                 )
             except Exception as e:
+                live_preview.empty()
                 status.update(label="Optimization failed", state="error")
                 st.error(f"Error during optimization: {e}")
                 st.stop()
 
+            if result["usage"]["calls"]:
+                _log_status(_format_usage(result["usage"]))
             _log_status("Generating PDF…")
+            pdf_error = None
             try:
-                output_pdf_path = export_resume_pdf(
+                pdf_bytes = export_resume_pdf_bytes(
                     content_html=result["content_html"],
                     template_id=selected_template_id,
                     primary_color=primary_color,
-                    job_title=result["job_title"],
-                    company=result["company"],
+                    max_pages=max_pages,
+                    optimize=compress_pdf,
+                    on_report=lambda r: _log_status(_format_pdf_report(r)),
                 )
             except Exception as e:
+                pdf_bytes = None
+                pdf_error = e
                 status.update(label="PDF export failed", state="error")
-                st.error(f"Error generating PDF: {e}")
-                st.stop()
-
-            status.update(label="✅ Optimization complete!", state="complete")
+            else:
+                status.update(label="✅ Optimization complete!", state="complete")
 
         st.session_state["_opt_content_html"] = result["content_html"]
         st.session_state["_opt_job_title"] = result["job_title"]
         st.session_state["_opt_company"] = result["company"]
         st.session_state["_opt_fingerprint"] = current_fingerprint
 
-        with open(output_pdf_path, "rb") as f:
-            pdf_bytes = f.read()
-        st.session_state["_opt_pdf_bytes"] = pdf_bytes
-        st.session_state["_opt_pdf_name"] = output_pdf_path.name
-        st.session_state["_opt_success_msg"] = (
-            f"Resume optimized! Saved to: **{output_pdf_path.name}**"
-        )
+        if pdf_error is not None:
+            st.error(
+                f"Error generating PDF: {pdf_error}\n\n"
+                "The optimized resume is still available as text below."
+            )
+        else:
+            pdf_name = build_output_path(result["job_title"], result["company"]).name
+            st.session_state["_opt_pdf_bytes"] = pdf_bytes
+            st.session_state["_opt_pdf_name"] = pdf_name
+            st.session_state["_opt_success_msg"] = (
+                f"Resume optimized! Ready to download: **{pdf_name}**"
+            )
 
-        st.success(st.session_state["_opt_success_msg"])
-        st.download_button(
-            label="⬇️ Download Optimized Resume (PDF)",
-            data=pdf_bytes,
-            file_name=output_pdf_path.name,
-            mime="application/pdf",
-            type="primary",
+            st.success(st.session_state["_opt_success_msg"])
+            st.download_button(
+                label="⬇️ Download Optimized Resume (PDF)",
+                data=pdf_bytes,
+                file_name=pdf_name,
+                mime="application/pdf",
+                type="primary",
+            )
+        _show_text_downloads(
+            result["content_html"], result["job_title"], result["company"]
         )
 
 # ── Re-export with new style (cached) ────────────────────────────────────────
@@ -587,35 +665,40 @@ elif export_button and has_cached:
     company = st.session_state["_opt_company"]
 
     with results_area.container():
+        pdf_reports = []
         with st.spinner("Generating PDF with new style…"):
             try:
-                output_pdf_path = export_resume_pdf(
+                pdf_bytes = export_resume_pdf_bytes(
                     content_html=content_html,
                     template_id=selected_template_id,
                     primary_color=primary_color,
-                    job_title=job_title,
-                    company=company,
+                    max_pages=max_pages,
+                    optimize=compress_pdf,
+                    on_report=pdf_reports.append,
                 )
             except Exception as e:
                 st.error(f"Error generating PDF: {e}")
+                _show_text_downloads(content_html, job_title, company)
                 st.stop()
+        for report in pdf_reports:
+            st.caption(_format_pdf_report(report))
 
-        with open(output_pdf_path, "rb") as f:
-            pdf_bytes = f.read()
+        pdf_name = build_output_path(job_title, company).name
         st.session_state["_opt_pdf_bytes"] = pdf_bytes
-        st.session_state["_opt_pdf_name"] = output_pdf_path.name
+        st.session_state["_opt_pdf_name"] = pdf_name
         st.session_state["_opt_success_msg"] = (
-            f"PDF re-exported with new style! Saved to: **{output_pdf_path.name}**"
+            f"PDF re-exported with new style! Ready to download: **{pdf_name}**"
         )
 
         st.success(st.session_state["_opt_success_msg"])
         st.download_button(
             label="⬇️ Download Optimized Resume (PDF)",
             data=pdf_bytes,
-            file_name=output_pdf_path.name,
+            file_name=pdf_name,
             mime="application/pdf",
             type="primary",
         )
+        _show_text_downloads(content_html, job_title, company)
 
 # ── Persist results across reruns (e.g. after download click) ────────────────
 
@@ -642,3 +725,9 @@ else:
                 mime="application/pdf",
                 type="primary",
             )
+        if "_opt_content_html" in st.session_state:
+            _show_text_downloads(
+                st.session_state["_opt_content_html"],
+                st.session_state["_opt_job_title"],
+                st.session_state["_opt_company"],
+            )
@@ -2,7 +2,17 @@
 
 from pathlib import Path
 
-from ats_resume_optimizer.agent import export_resume_pdf, optimize_resume, run_resume_agent
+from ats_resume_optimizer.agent import (
+    export_resume_pdf,
+    export_resume_pdf_async,
+    export_resume_pdf_bytes,
+    export_resume_pdf_bytes_async,
+    export_resume_pdfs,
+    export_resume_text,
+    export_style_pack,
+    optimize_resume,
+    run_resume_agent,
+)
 from ats_resume_optimizer.config import BASE_DIR, OUTPUT_DIR, RESUME_DIR
 
 __version__ = (Path(__file__).resolve().parent.parent / "VERSION").read_text().strip()
@@ -10,6 +20,12 @@ __version__ = (Path(__file__).resolve().parent.parent / "VERSION").read_text().s
 __all__ = [
     "__version__",
     "export_resume_pdf",
+    "export_resume_pdf_async",
+    "export_resume_pdf_bytes",
+    "export_resume_pdf_bytes_async",
+    "export_resume_pdfs",
+    "export_resume_text",
+    "export_style_pack",
     "optimize_resume",
     "run_resume_agent",
     "BASE_DIR",
@@ -1,11 +1,22 @@
 """CLI entry point: python -m ats_resume_optimizer."""
 
 import argparse
+import sys
 from pathlib import Path
 
-from ats_resume_optimizer import run_resume_agent
+from ats_resume_optimizer import (
+    export_resume_pdf,
+    export_resume_text,
+    export_style_pack,
+    optimize_resume,
+)
 from ats_resume_optimizer.config import RESUME_DIR
+from ats_resume_optimizer.fake_llm import FakeLLM, make_server
+from ats_resume_optimizer.llm import STOP_REASONS, StoppingPolicy
+from ats_resume_optimizer.pdf_export import chromium_is_ready, install_browser
 from ats_resume_optimizer.templates import get_template_choices
+from ats_resume_optimizer.text_export import TEXT_FORMATS
+from ats_resume_optimizer.thumbnails import DEFAULT_COLOR, build_thumbnails
 
 
 def _print_iteration(data: dict) -> None:
@@ -32,6 +43,22 @@ def _print_iteration(data: dict) -> None:
                 f"({verification['must_have_found']}/{verification['must_have_total']})"
             )
 
+    if data.get("input_tokens"):
+        parts.append(
+            f"Input tokens: {data['input_tokens']} "
+            f"({data['cached_tokens'] / data['input_tokens']:.0%} cached)"
+        )
+    if data.get("candidates"):
+        picked = next(
+            (c for c in data["candidates"] if c.get("selected")), None
+        )
+        if picked:
+            parts.append(
+                f"Best of {len(data['candidates'])}: #{picked['candidate'] + 1}"
+            )
+    if data.get("edited_blocks"):
+        parts.append(f"Edited: {', '.join(data['edited_blocks'])}")
+
     print(" | ".join(parts))
 
     if strategies:
@@ -55,13 +82,167 @@ def _print_iteration(data: dict) -> None:
         else:
             print(f"  Missing: {', '.join(pending)}")
 
+    if data.get("stop_reason"):
+        print(f"  Stopped: {STOP_REASONS[data['stop_reason']]}")
+
     print()
 
 
-def main() -> None:
+def _partial_printer():
+    """Return an ``on_partial`` callback showing a live drafting counter."""
+    chars: dict[int, int] = {}
+
+    def _print_partial(event: dict) -> None:
+        if event["field"] != "tailored_resume_html":
+            return
+        i = event["iteration"]
+        if "delta" in event:
+            chars[i] = chars.get(i, 0) + len(event["delta"])
+            print(f"\r  Iteration {i}: drafting… {chars[i]:,} chars", end="")
+        elif i in chars:
+            print(flush=True)
+
+    return _print_partial
+
+
+def _print_pdf_report(report: dict) -> None:
+    before = report["original_bytes"] / 1024
+    after = report["optimized_bytes"] / 1024
+    suffix = ", linearized" if report.get("linearized") else ""
+    print(
+        f"  PDF {report['template_id']}: {before:.0f} KB -> {after:.0f} KB{suffix}"
+    )
+
+
+def _print_usage(usage: dict) -> None:
+    if not usage["calls"]:
+        return
+    cost = f", ~${usage['cost_usd']:.4f}" if usage["cost_usd"] is not None else ""
+    print(
+        f"  LLM: {usage['calls']} calls, {usage['input_tokens']:,} in "
+        f"({usage['cached_tokens']:,} cached, {usage['cached_ratio']:.0%}) / "
+        f"{usage['output_tokens']:,} out "
+        f"tokens, {usage['latency_s']:.1f}s{cost}"
+    )
+
+
+def _install_browser(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m ats_resume_optimizer install-browser",
+        description="Provision the Playwright Chromium used for PDF export",
+    )
+    parser.add_argument(
+        "--no-deps",
+        action="store_true",
+        help="Skip installing OS packages (playwright install-deps)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-run the install even if Chromium is already present",
+    )
+    parser.add_argument(
+        "--no-thumbnails",
+        action="store_true",
+        help="Skip pre-building the theme gallery thumbnails",
+    )
+    args = parser.parse_args(argv)
+
+    if not args.force and chromium_is_ready():
+        print("Chromium is already installed.")
+    else:
+        print("Installing Playwright Chromium...")
+        install_browser(with_deps=not args.no_deps)
+        print("Chromium installed.")
+
+    if not args.no_thumbnails:
+        try:
+            count = build_thumbnails()
+        except RuntimeError as e:
+            print(f"Skipped theme thumbnails: {e}")
+        else:
+            print(f"Theme thumbnails ready ({count}).")
+
+
+def _build_thumbnails(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m ats_resume_optimizer build-thumbnails",
+        description="Render and cache theme gallery thumbnails",
+    )
+    parser.add_argument(
+        "--color",
+        action="append",
+        dest="colors",
+        help=f"Accent color hex; repeatable (default: {DEFAULT_COLOR})",
+    )
+    args = parser.parse_args(argv)
+
+    count = build_thumbnails(args.colors)
+    print(f"Theme thumbnails ready ({count}).")
+
+
+def _fake_llm(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m ats_resume_optimizer fake-llm",
+        description="Serve a deterministic offline stand-in for the OpenAI "
+        "chat-completions API (benchmarks, load tests, CI)",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=None,
+        help="Seconds before the first token (default: ATS_FAKE_LLM_LATENCY or 0)",
+    )
+    parser.add_argument(
+        "--tokens-per-s",
+        type=float,
+        default=None,
+        help="Generation speed; 0 is instant "
+        "(default: ATS_FAKE_LLM_TOKENS_PER_S or 0)",
+    )
+    args = parser.parse_args(argv)
+
+    llm = FakeLLM()
+    if args.latency is not None:
+        llm.latency = args.latency
+    if args.tokens_per_s is not None:
+        llm.tokens_per_s = args.tokens_per_s
+    server = make_server(args.host, args.port, llm)
+    print(
+        f"Fake LLM listening; set OPENAI_BASE_URL=http://{args.host}:{args.port}/v1 "
+        "(any OPENAI_API_KEY). Ctrl+C to stop."
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["install-browser"]:
+        _install_browser(argv[1:])
+        return
+    if argv[:1] == ["build-thumbnails"]:
+        _build_thumbnails(argv[1:])
+        return
+    if argv[:1] == ["fake-llm"]:
+        _fake_llm(argv[1:])
+        return
+
     template_ids = [t[0] for t in get_template_choices()]
 
-    parser = argparse.ArgumentParser(description="AI ATS Resume Optimizer")
+    parser = argparse.ArgumentParser(
+        description="AI ATS Resume Optimizer",
+        epilog="Run 'python -m ats_resume_optimizer install-browser' to "
+        "provision Chromium for PDF export (and pre-build theme thumbnails) "
+        "ahead of time; 'build-thumbnails' refreshes the thumbnails; "
+        "'fake-llm' serves an offline stand-in for the OpenAI API.",
+    )
     parser.add_argument("--jd-text", type=str, help="Job description text")
     parser.add_argument("--jd-url", type=str, help="Job URL to fetch description from")
     parser.add_argument(
@@ -86,19 +267,140 @@ def main() -> None:
     parser.add_argument(
         "--color", type=str, default="#2563eb", help="Accent color hex (default: #2563eb)"
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--full-context",
+        action="store_true",
+        help="Resend the whole conversation on every refinement instead of "
+        "only the checklist and best draft (more input tokens)",
+    )
+    parser.add_argument(
+        "--full-rewrites",
+        action="store_true",
+        help="Regenerate the whole resume on every refinement instead of "
+        "only the sections that change (more output tokens)",
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=1,
+        help="Drafts generated in parallel per iteration; the best is kept "
+        "(fewer rounds, more tokens; default: 1)",
+    )
+    parser.add_argument(
+        "--patience",
+        type=int,
+        default=2,
+        help="Stop after this many iterations without a verified-score "
+        "gain; 0 disables (default: 2)",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        help="Stop before another iteration would exceed this many seconds",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=None,
+        help="Stop before another iteration would exceed this many tokens",
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=None,
+        help="Scale the PDF down until it fits this many A4 pages",
+    )
+    parser.add_argument(
+        "--optimize-pdf",
+        action="store_true",
+        help="Compress the exported PDF (recompress streams, dedupe objects, "
+        "strip metadata) and report the size saved",
+    )
+    parser.add_argument(
+        "--format",
+        default="pdf",
+        choices=["pdf", *TEXT_FORMATS],
+        help="Output format; txt/md/html skip the browser entirely (default: pdf)",
+    )
+    parser.add_argument(
+        "--all-templates",
+        action="store_true",
+        help="Export the resume in every template (with --color) as a ZIP style pack",
+    )
+    args = parser.parse_args(argv)
+    if args.candidates < 1:
+        parser.error("--candidates must be at least 1")
+    if args.max_pages is not None and args.max_pages < 1:
+        parser.error("--max-pages must be at least 1")
+    if args.all_templates and args.format != "pdf":
+        parser.error("--all-templates only applies to --format pdf")
 
-    output_pdf = run_resume_agent(
+    result = optimize_resume(
         base_resume_pdf=Path(args.resume),
         jd_text=args.jd_text,
         jd_url=args.jd_url,
         target_score=args.target_score,
         max_iterations=args.max_iterations,
-        template_id=args.template,
         primary_color=args.color,
         on_iteration=_print_iteration,
         on_status=lambda msg: print(f"  {msg}"),
+        compact_context=not args.full_context,
+        section_edits=not args.full_rewrites,
+        on_partial=_partial_printer() if sys.stdout.isatty() else None,
+        candidates=args.candidates,
+        stopping=StoppingPolicy(
+            patience=args.patience,
+            max_seconds=args.time_budget,
+            max_tokens=args.token_budget,
+        ),
     )
+    _print_usage(result["usage"])
+
+    if args.format != "pdf":
+        output = export_resume_text(
+            result["content_html"],
+            result["job_title"],
+            result["company"],
+            args.format,
+        )
+        print(f"\nOptimized resume saved to: {output}")
+        return
+
+    try:
+        if args.all_templates:
+            print("  Exporting all templates...")
+            zip_path = export_style_pack(
+                content_html=result["content_html"],
+                primary_color=args.color,
+                job_title=result["job_title"],
+                company=result["company"],
+                max_pages=args.max_pages,
+                optimize=args.optimize_pdf,
+                on_report=_print_pdf_report,
+            )
+            print(f"\nStyle pack saved to: {zip_path}")
+            return
+
+        print("  Generating PDF...")
+        output_pdf = export_resume_pdf(
+            content_html=result["content_html"],
+            template_id=args.template,
+            primary_color=args.color,
+            job_title=result["job_title"],
+            company=result["company"],
+            max_pages=args.max_pages,
+            optimize=args.optimize_pdf,
+            on_report=_print_pdf_report,
+        )
+    except RuntimeError as e:
+        # Don't lose the optimized content when the browser is unavailable.
+        print(f"  PDF export failed: {e}")
+        output = export_resume_text(
+            result["content_html"], result["job_title"], result["company"]
+        )
+        print(f"\nPlain-text resume saved instead to: {output}")
+        sys.exit(1)
     print(f"\nOptimized resume saved to: {output_pdf}")
 
 
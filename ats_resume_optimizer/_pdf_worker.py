@@ -1,32 +1,430 @@
 """Subprocess worker for Playwright PDF generation.
 
 Invoked as a separate process to avoid event-loop conflicts with Streamlit.
-Usage: python _pdf_worker.py <html_file> <output_pdf>
+
+Usage:
+    python _pdf_worker.py --serve    long-lived render service
+    python _pdf_worker.py --once     answer a single request, then exit
+
+The worker launches Chromium, writes a ``{"ready": ...}`` line, and then reads
+one JSON request per line on stdin (``{"jobs": [{"html": ...}, ...]}``; a job
+may also set ``"wait_for_network": true``, ``"max_pages": N``, and
+``"optimize": true`` / ``"linearize": true`` for the pypdf post-processing
+pass, and ``"timeout": seconds``), answering each with one JSON line on
+stdout: ``{"ok": true, "results": [...], "reports": [...]}`` with one
+base64-encoded PDF and one size report per job, or ``{"ok": false, "error":
+..., "errors": [{"index", "type", "message", "timed_out"}, ...]}``.  A request
+with ``"screenshot_scale": s`` returns PNG screenshots of each document's
+first A4 page at device scale factor ``s`` instead of PDFs (thumbnails).
+Nothing touches the filesystem.  The jobs of a request are rendered
+concurrently on separate pages of one browser context.  The browser is
+relaunched if it crashes between or during requests, or if a job exceeds its
+timeout (a hung renderer can wedge the whole browser); the request is then
+retried once.  The service exits when stdin is closed.
 """
 
+import asyncio
+import base64
+import io
+import json
 import sys
 
-from playwright.sync_api import sync_playwright
+from playwright.async_api import (
+    Browser,
+    BrowserContext,
+    Page,
+    Playwright,
+    async_playwright,
+)
+from pypdf import PdfWriter
 
+try:
+    import pikepdf
+except ImportError:  # linearization is optional
+    pikepdf = None
 
-def main() -> None:
-    html_path = sys.argv[1]
-    output_path = sys.argv[2]
-
-    with open(html_path, "r", encoding="utf-8") as f:
-        html = f.read()
-
-    with sync_playwright() as pw:
-        browser = pw.chromium.launch()
-        page = browser.new_page()
-        page.set_content(html, wait_until="networkidle")
-        page.pdf(
-            path=output_path,
+# Pages rendered at once within a batch; bounds Chromium memory on large packs.
+_BATCH_CONCURRENCY = 4
+
+# Smallest zoom the fit-to-pages search may apply before giving up on fitting.
+_MIN_FIT_SCALE = 0.6
+
+# Document-info entries that describe the toolchain rather than the resume.
+_STRIPPED_INFO_KEYS = ("/Creator", "/Producer", "/CreationDate", "/ModDate")
+
+# One A4 sheet (210mm x 297mm) in CSS px at 96 dpi.
+_A4_VIEWPORT = {"width": 794, "height": 1123}
+
+# How long closing a browser after a timeout may take before it is abandoned.
+_CLOSE_TIMEOUT = 10
+
+# Returns the printable content box of the document's default @page rule (A4
+# minus its margins) and the margins themselves, in CSS px.  Lengths are
+# resolved by the layout engine, so any unit a template uses for its margins
+# works.
+_PAGE_BOX_JS = """() => {
+    const toPx = (value) => {
+        const probe = document.createElement("div");
+        probe.style.cssText = "position:absolute;visibility:hidden;width:0";
+        probe.style.height = value || "0";
+        document.body.appendChild(probe);
+        const px = probe.getBoundingClientRect().height;
+        probe.remove();
+        return px;
+    };
+    const margin = {top: "0", right: "0", bottom: "0", left: "0"};
+    for (const sheet of document.styleSheets) {
+        let rules;
+        try {
+            rules = sheet.cssRules;
+        } catch (e) {
+            continue;  // cross-origin sheet (external assets); unreadable
+        }
+        for (const rule of rules) {
+            if (rule instanceof CSSPageRule && !rule.selectorText) {
+                margin.top = rule.style.marginTop || margin.top;
+                margin.right = rule.style.marginRight || margin.right;
+                margin.bottom = rule.style.marginBottom || margin.bottom;
+                margin.left = rule.style.marginLeft || margin.left;
+            }
+        }
+    }
+    const px = {
+        top: toPx(margin.top),
+        right: toPx(margin.right),
+        bottom: toPx(margin.bottom),
+        left: toPx(margin.left),
+    };
+    return {
+        width: toPx("210mm") - px.left - px.right,
+        height: toPx("297mm") - px.top - px.bottom,
+        margin: px,
+    };
+}"""
+
+# Binary-searches the largest body zoom at which the laid-out document fits in
+# ``budget`` CSS px of height, leaves that zoom applied, and returns it.
+_FIT_JS = """([budget, minScale]) => {
+    const measure = (scale) => {
+        document.body.style.zoom = String(scale);
+        return document.documentElement.scrollHeight;
+    };
+    if (measure(1) <= budget) return 1;
+    if (measure(minScale) > budget) return minScale;
+    let lo = minScale, hi = 1;
+    for (let i = 0; i < 10; i++) {
+        const mid = (lo + hi) / 2;
+        if (measure(mid) <= budget) lo = mid; else hi = mid;
+    }
+    measure(lo);
+    return lo;
+}"""
+
+
+def _send(message: dict) -> None:
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+async def _fit_to_pages(page: Page, max_pages: int) -> float:
+    """Shrink the document in place until it fits ``max_pages`` printed pages.
+
+    The page is laid out at the printable width of the template's ``@page``
+    box under print media, then a body zoom factor is binary-searched against
+    ``max_pages`` times the printable height — all in one browser page, so
+    the PDF is generated only once.  Returns the applied scale.
+    """
+    box = await page.evaluate(_PAGE_BOX_JS)
+    # A short viewport keeps scrollHeight from being floored at its height.
+    await page.set_viewport_size({"width": round(box["width"]), "height": 100})
+    await page.emulate_media(media="print")
+    # Keep ~3% slack for gaps left by page-break-inside: avoid blocks.
+    budget = box["height"] * max_pages * 0.97
+    return await page.evaluate(_FIT_JS, [budget, _MIN_FIT_SCALE])
+
+
+def _optimize_pdf(pdf: bytes, linearize: bool = False) -> tuple[bytes, dict]:
+    """Shrink a Chromium PDF; return the new bytes and a size report.
+
+    Content streams are recompressed at the highest zlib level, identical
+    objects (repeated font subsets, gradient shadings, images) are merged and
+    orphans dropped, and toolchain metadata and XMP are stripped; the title
+    is kept.  With ``linearize`` and pikepdf installed, the result is
+    linearized for fast web view.  The output is deterministic so it can be
+    cached.
+    """
+    writer = PdfWriter(clone_from=io.BytesIO(pdf))
+    for page in writer.pages:
+        page.compress_content_streams(level=9)
+    writer.compress_identical_objects()
+    info = {
+        key: value
+        for key, value in (writer.metadata or {}).items()
+        if key not in _STRIPPED_INFO_KEYS
+    }
+    writer.metadata = None
+    if info:
+        writer.add_metadata(info)
+    if "/Metadata" in writer.root_object:
+        del writer.root_object["/Metadata"]
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    optimized = buffer.getvalue()
+
+    linearized = False
+    if linearize and pikepdf is not None:
+        with pikepdf.open(io.BytesIO(optimized)) as doc:
+            buffer = io.BytesIO()
+            doc.save(buffer, linearize=True, deterministic_id=True)
+        optimized = buffer.getvalue()
+        linearized = True
+
+    if len(optimized) >= len(pdf) and not linearized:
+        optimized = pdf  # nothing gained; keep Chromium's original
+    return optimized, {
+        "original_bytes": len(pdf),
+        "optimized_bytes": len(optimized),
+        "linearized": linearized,
+    }
+
+
+async def _load(page: Page, html: str, wait_for_network: bool) -> None:
+    """Load a document and wait until it is ready to print.
+
+    Templates are self-contained (inline CSS, data: URIs), so the default is
+    to wait for the load event plus ``document.fonts.ready`` — a deterministic
+    signal — rather than Playwright's 500 ms network-quiet window.  Documents
+    that pull external assets opt in to ``networkidle`` via
+    ``wait_for_network``.
+    """
+    await page.set_content(
+        html, wait_until="networkidle" if wait_for_network else "load"
+    )
+    await page.evaluate("() => document.fonts.ready.then(() => true)")
+
+
+async def _render(
+    context: BrowserContext,
+    html: str,
+    wait_for_network: bool = False,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    linearize: bool = False,
+) -> tuple[bytes, dict]:
+    """Render one document to PDF; return it with a size report.
+
+    With ``max_pages`` the content is scaled down to fit before printing.
+    With ``optimize`` the PDF goes through ``_optimize_pdf`` on a worker
+    thread, so other pages keep rendering meanwhile.
+    """
+    page = await context.new_page()
+    try:
+        await _load(page, html, wait_for_network)
+        if max_pages:
+            await _fit_to_pages(page, max_pages)
+        pdf = await page.pdf(
             format="A4",
             print_background=True,
             prefer_css_page_size=True,
         )
-        browser.close()
+    finally:
+        await page.close()
+    if optimize:
+        return await asyncio.to_thread(_optimize_pdf, pdf, linearize)
+    return pdf, {"original_bytes": len(pdf), "optimized_bytes": len(pdf)}
+
+
+async def _screenshot(
+    context: BrowserContext, html: str, wait_for_network: bool = False
+) -> tuple[bytes, dict]:
+    """Capture the first printed page of a document as a PNG.
+
+    The ``@page`` margins are applied as padding so the thumbnail matches
+    the PDF layout; the context's viewport is one A4 sheet.
+    """
+    page = await context.new_page()
+    try:
+        await _load(page, html, wait_for_network)
+        await page.emulate_media(media="print")
+        box = await page.evaluate(_PAGE_BOX_JS)
+        m = box["margin"]
+        await page.add_style_tag(
+            content=(
+                f"html {{ padding: {m['top']}px {m['right']}px "
+                f"{m['bottom']}px {m['left']}px; box-sizing: border-box; }}"
+            )
+        )
+        png = await page.screenshot(type="png")
+        return png, {"original_bytes": len(png), "optimized_bytes": len(png)}
+    finally:
+        await page.close()
+
+
+async def _render_jobs(
+    browser: Browser, jobs: list[dict], screenshot_scale: float | None = None
+) -> tuple[list[tuple[bytes, dict] | BaseException], bool]:
+    """Render all jobs on one browser context; return a result or error per job.
+
+    Results are PDFs, or PNG thumbnails when ``screenshot_scale`` is set.
+    The flag is False when the context did not close within
+    ``_CLOSE_TIMEOUT``, i.e. the browser is wedged and must be replaced.
+    """
+    semaphore = asyncio.Semaphore(_BATCH_CONCURRENCY)
+    if screenshot_scale:
+        context = await browser.new_context(
+            viewport=_A4_VIEWPORT, device_scale_factor=screenshot_scale
+        )
+    else:
+        context = await browser.new_context()
+
+    async def _one(job: dict) -> tuple[bytes, dict]:
+        async with semaphore:
+            if screenshot_scale:
+                work = _screenshot(
+                    context, job["html"], job.get("wait_for_network", False)
+                )
+            else:
+                work = _render(
+                    context,
+                    job["html"],
+                    job.get("wait_for_network", False),
+                    job.get("max_pages"),
+                    job.get("optimize", False),
+                    job.get("linearize", False),
+                )
+            return await asyncio.wait_for(work, job.get("timeout"))
+
+    results = await asyncio.gather(
+        *(_one(job) for job in jobs), return_exceptions=True
+    )
+    if not browser.is_connected():
+        return results, True
+    try:
+        await asyncio.wait_for(context.close(), _CLOSE_TIMEOUT)
+    except Exception:  # noqa: BLE001 – a hung page can wedge the close too
+        return results, False
+    return results, True
+
+
+async def _launch(pw: Playwright) -> Browser:
+    return await pw.chromium.launch()
+
+
+async def _close(browser: Browser) -> None:
+    """Close a possibly wedged browser, giving up after ``_CLOSE_TIMEOUT``."""
+    try:
+        await asyncio.wait_for(browser.close(), _CLOSE_TIMEOUT)
+    except Exception:  # noqa: BLE001 – the browser is discarded either way
+        pass
+
+
+def _error_report(results: list) -> list[dict]:
+    return [
+        {
+            "index": i,
+            "type": type(r).__name__,
+            "message": str(r),
+            "timed_out": isinstance(r, TimeoutError),
+        }
+        for i, r in enumerate(results)
+        if isinstance(r, BaseException)
+    ]
+
+
+def _failure(errors: list[dict]) -> dict:
+    return {
+        "ok": False,
+        "error": "\n".join(
+            ("browser" if e["index"] is None else f"job {e['index']}")
+            + f": {e['type']}: {e['message']}"
+            + (" (timed out)" if e["timed_out"] else "")
+            for e in errors
+        ),
+        "errors": errors,
+    }
+
+
+def _launch_error(e: Exception) -> dict:
+    return {
+        "index": None,
+        "type": type(e).__name__,
+        "message": f"relaunch failed: {e}",
+        "timed_out": False,
+    }
+
+
+async def _serve(once: bool = False) -> None:
+    loop = asyncio.get_running_loop()
+    async with async_playwright() as pw:
+        try:
+            browser = await _launch(pw)
+        except Exception as e:  # noqa: BLE001 – reported to the parent
+            _send({"ready": False, "error": str(e)})
+            return
+        _send({"ready": True})
+
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                break
+            if not line.strip():
+                continue
+
+            request = json.loads(line)
+            for attempt in range(2):
+                if not browser.is_connected():
+                    try:
+                        browser = await _launch(pw)
+                    except Exception as e:  # noqa: BLE001 – reported to the parent
+                        # Exit so the parent starts a fresh worker next time.
+                        _send(_failure([_launch_error(e)]))
+                        return
+                try:
+                    results, closed = await _render_jobs(
+                        browser,
+                        request["jobs"],
+                        request.get("screenshot_scale"),
+                    )
+                except Exception as e:  # noqa: BLE001 – reported to the parent
+                    results, closed = [e], True
+                errors = _error_report(results)
+                timed_out = any(error["timed_out"] for error in errors)
+                if timed_out or not closed:
+                    # A hung page may have wedged the browser; start over.
+                    await _close(browser)
+                    try:
+                        browser = await _launch(pw)
+                    except Exception as e:  # noqa: BLE001 – reported to the parent
+                        _send(_failure(errors + [_launch_error(e)]))
+                        return
+                # A crashed or hung browser gets one relaunch-and-retry;
+                # anything else (bad HTML, page crash) is the caller's error.
+                crashed = errors and not browser.is_connected()
+                if attempt == 0 and (timed_out or crashed):
+                    continue
+                if errors:
+                    _send(_failure(errors))
+                else:
+                    _send(
+                        {
+                            "ok": True,
+                            "results": [
+                                base64.b64encode(data).decode("ascii")
+                                for data, _ in results
+                            ],
+                            "reports": [report for _, report in results],
+                        }
+                    )
+                break
+            if once:
+                break
+
+        if browser.is_connected():
+            await browser.close()
+
+
+def main() -> None:
+    asyncio.run(_serve(once=sys.argv[1:] == ["--once"]))
 
 
 if __name__ == "__main__":
@@ -1,17 +1,35 @@
 """Main agent: orchestrate resume extraction, JD loading, optimization, and PDF export."""
 
+import zipfile
 from pathlib import Path
 from typing import Callable
 
+from ats_resume_optimizer.jd_cache import (
+    get_cached_analysis,
+    jd_cache_key,
+    store_analysis,
+)
 from ats_resume_optimizer.job_description import get_job_description
 from ats_resume_optimizer.llm import (
-    extract_jd_keywords,
-    extract_title_and_company,
+    JD_ANALYSIS_MODEL,
+    analyze_job_description,
     optimize_until_target,
+    summarize_usage,
+)
+from ats_resume_optimizer.pdf_cache import get_cached_pdf, pdf_cache_key, store_pdf
+from ats_resume_optimizer.pdf_export import (
+    PdfRenderError,
+    html_to_pdfs_bytes,
+    run_render_async,
 )
-from ats_resume_optimizer.pdf_export import html_to_pdf
 from ats_resume_optimizer.resume import extract_resume_text
-from ats_resume_optimizer.templates import render_resume
+from ats_resume_optimizer.templates import (
+    TEMPLATES,
+    get_template_version,
+    render_resume,
+    template_uses_network,
+)
+from ats_resume_optimizer.text_export import TEXT_FORMATS, render_text
 from ats_resume_optimizer.utils import build_output_path
 
 
@@ -25,28 +43,55 @@ def optimize_resume(
     api_key: str | None = None,
     on_iteration: Callable[[dict], None] | None = None,
     on_status: Callable[[str], None] | None = None,
+    compact_context: bool = False,
+    on_usage: Callable[[dict], None] | None = None,
+    on_partial: Callable[[dict], None] | None = None,
+    candidates: int = 1,
+    stopping: Callable[[list[dict], int], str | None] | None = None,
+    section_edits: bool = False,
 ) -> dict:
     """Run the full optimization pipeline and return cached-friendly results.
 
-    Returns a dict with keys: content_html, job_title, company, jd_keywords.
+    Returns a dict with keys: content_html, job_title, company, jd_keywords,
+    usage (``llm.summarize_usage`` of every LLM call in the run).
+    ``on_usage`` receives each call's record as it completes; see
+    ``optimize_until_target`` for ``compact_context``, ``on_partial``
+    (streamed drafts for a live preview), ``candidates`` (parallel drafts
+    per iteration), ``stopping`` (when the loop ends) and ``section_edits``
+    (refinements return only the changed sections).
     """
     if on_status:
         on_status("Extracting resume text...")
+    calls: list[dict] = []
+
+    def _record(record: dict) -> None:
+        calls.append(record)
+        if on_usage:
+            on_usage(record)
+
     resume_text = extract_resume_text(base_resume_pdf)
 
     if on_status:
         on_status("Loading job description...")
     job_description = get_job_description(jd_text=jd_text, jd_url=jd_url)
 
-    if on_status:
-        on_status("Analyzing job description and extracting keywords...")
-    jd_keywords = extract_jd_keywords(job_description, api_key=api_key)
-
-    if on_status:
-        on_status("Extracting job title and company...")
-    job_title, company = extract_title_and_company(
-        job_description, api_key=api_key
-    )
+    jd_key = jd_cache_key(job_description, JD_ANALYSIS_MODEL)
+    jd_keywords = get_cached_analysis(jd_key)
+    if jd_keywords is not None:
+        if on_status:
+            on_status("Using cached job description analysis...")
+    else:
+        if on_status:
+            on_status("Analyzing job description and extracting keywords...")
+        jd_keywords = analyze_job_description(
+            job_description,
+            model=JD_ANALYSIS_MODEL,
+            api_key=api_key,
+            on_usage=_record,
+        )
+        store_analysis(jd_key, jd_keywords)
+    job_title = jd_keywords.get("job_title") or "UnknownRole"
+    company = jd_keywords.get("company") or "UnknownCompany"
 
     if on_status:
         on_status("Starting ATS optimization loop...")
@@ -59,6 +104,12 @@ def optimize_resume(
         primary_color=primary_color,
         api_key=api_key,
         on_iteration=on_iteration,
+        compact_context=compact_context,
+        on_usage=_record,
+        on_partial=on_partial,
+        candidates=candidates,
+        stopping=stopping,
+        section_edits=section_edits,
     )
 
     return {
@@ -66,20 +117,245 @@ def optimize_resume(
         "job_title": job_title,
         "company": company,
         "jd_keywords": jd_keywords,
+        "usage": summarize_usage(calls),
     }
 
 
+def _variant_label(template_id: str, primary_color: str) -> str:
+    return f"{template_id}_{primary_color.lstrip('#')}"
+
+
+def _render_variants(
+    content_html: str,
+    variants: list[tuple[str, str]],
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
+) -> dict[tuple[str, str], bytes]:
+    """Render ``(template_id, primary_color)`` variants to PDF bytes.
+
+    Cached documents come from the PDF cache; the misses are rendered in one
+    browser request (two if some templates need network idle) and cached.
+    With ``optimize``, freshly rendered PDFs are post-processed by the worker
+    and ``on_report`` receives each one's before/after size.
+    """
+    pdfs: dict[tuple[str, str], bytes] = {}
+    misses: list[tuple[tuple[str, str], str, str]] = []
+    for template_id, color in variants:
+        full_html = render_resume(template_id, content_html, color)
+        key = pdf_cache_key(
+            full_html,
+            get_template_version(template_id),
+            max_pages=max_pages,
+            optimize=optimize,
+        )
+        cached = get_cached_pdf(key)
+        if cached is not None:
+            pdfs[(template_id, color)] = cached
+        else:
+            misses.append(((template_id, color), key, full_html))
+
+    # Templates with external assets wait for network idle; render them as
+    # their own batch so self-contained ones keep the fast ready signal.
+    for wait_for_network in (False, True):
+        group = [
+            miss for miss in misses
+            if template_uses_network(miss[0][0]) == wait_for_network
+        ]
+        if not group:
+            continue
+        def _report(report: dict, group=group) -> None:
+            template_id, color = group[report.pop("index")][0]
+            on_report(
+                {"template_id": template_id, "primary_color": color, **report}
+            )
+
+        try:
+            rendered = html_to_pdfs_bytes(
+                [full_html for _, _, full_html in group],
+                wait_for_network,
+                max_pages,
+                optimize,
+                _report if on_report else None,
+            )
+        except PdfRenderError as e:
+            if e.job_index is not None:
+                e.template_id = group[e.job_index][0][0]
+            raise
+        for (variant, key, _), pdf in zip(group, rendered):
+            store_pdf(key, pdf)
+            pdfs[variant] = pdf
+    return {variant: pdfs[variant] for variant in variants}
+
+
+def export_resume_pdf_bytes(
+    content_html: str,
+    template_id: str,
+    primary_color: str,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
+) -> bytes:
+    """Render cached content HTML with a template and return the PDF bytes.
+
+    Nothing is written to disk except the PDF cache entry on a miss.  With
+    ``max_pages``, the content is scaled down in the browser to fit.  With
+    ``optimize``, the PDF is compressed by the worker's post-processing pass
+    and ``on_report`` receives the before/after sizes.
+    """
+    variant = (template_id, primary_color)
+    return _render_variants(
+        content_html, [variant], max_pages, optimize, on_report
+    )[variant]
+
+
 def export_resume_pdf(
     content_html: str,
     template_id: str,
     primary_color: str,
     job_title: str,
     company: str,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
 ) -> Path:
-    """Render cached content HTML with a template and export to PDF."""
-    full_html = render_resume(template_id, content_html, primary_color)
+    """Render cached content HTML with a template and export to PDF.
+
+    Previously rendered documents are served from the on-disk PDF cache.
+    """
     output_path = build_output_path(job_title, company)
-    html_to_pdf(full_html, output_path)
+    output_path.write_bytes(
+        export_resume_pdf_bytes(
+            content_html,
+            template_id,
+            primary_color,
+            max_pages,
+            optimize,
+            on_report,
+        )
+    )
+    return output_path
+
+
+async def export_resume_pdf_bytes_async(
+    content_html: str,
+    template_id: str,
+    primary_color: str,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
+) -> bytes:
+    """Async ``export_resume_pdf_bytes`` for use from an event loop.
+
+    Runs on the render thread pool, so concurrent calls are bounded by
+    ``ATS_PDF_MAX_CONCURRENT`` and queue instead of forking more browsers.
+    """
+    return await run_render_async(
+        export_resume_pdf_bytes,
+        content_html,
+        template_id,
+        primary_color,
+        max_pages,
+        optimize,
+        on_report,
+    )
+
+
+async def export_resume_pdf_async(
+    content_html: str,
+    template_id: str,
+    primary_color: str,
+    job_title: str,
+    company: str,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
+) -> Path:
+    """Async ``export_resume_pdf`` for use from an event loop."""
+    return await run_render_async(
+        export_resume_pdf,
+        content_html,
+        template_id,
+        primary_color,
+        job_title,
+        company,
+        max_pages,
+        optimize,
+        on_report,
+    )
+
+
+def export_resume_pdfs(
+    content_html: str,
+    variants: list[tuple[str, str]],
+    job_title: str,
+    company: str,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
+) -> dict[tuple[str, str], Path]:
+    """Export one PDF per ``(template_id, primary_color)`` in one browser session.
+
+    Returns a dict mapping each variant to its generated PDF path.
+    """
+    paths: dict[tuple[str, str], Path] = {}
+    for (template_id, color), pdf in _render_variants(
+        content_html, variants, max_pages, optimize, on_report
+    ).items():
+        path = build_output_path(
+            job_title, company, variant=_variant_label(template_id, color)
+        )
+        path.write_bytes(pdf)
+        paths[(template_id, color)] = path
+    return paths
+
+
+def export_style_pack(
+    content_html: str,
+    primary_color: str,
+    job_title: str,
+    company: str,
+    template_ids: list[str] | None = None,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
+) -> Path:
+    """Export the resume in every template (or ``template_ids``) as one ZIP.
+
+    Returns the path to the ZIP archive.
+    """
+    variants = [(tid, primary_color) for tid in (template_ids or TEMPLATES)]
+    pdfs = _render_variants(
+        content_html, variants, max_pages, optimize, on_report
+    )
+    zip_path = build_output_path(
+        job_title, company, variant="styles", suffix=".zip"
+    )
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for (template_id, color), pdf in pdfs.items():
+            name = build_output_path(
+                job_title, company, variant=_variant_label(template_id, color)
+            ).name
+            zf.writestr(name, pdf)
+    return zip_path
+
+
+def export_resume_text(
+    content_html: str,
+    job_title: str,
+    company: str,
+    fmt: str = "txt",
+) -> Path:
+    """Export cached content HTML as plain text, Markdown, or minimal HTML.
+
+    Pure Python (no browser), so it takes milliseconds and works when PDF
+    export is unavailable.  ``fmt`` is a key of ``text_export.TEXT_FORMATS``.
+    """
+    text = render_text(content_html, fmt)
+    output_path = build_output_path(
+        job_title, company, suffix=TEXT_FORMATS[fmt]["suffix"]
+    )
+    output_path.write_text(text, encoding="utf-8")
     return output_path
 
 
@@ -94,6 +370,15 @@ def run_resume_agent(
     api_key: str | None = None,
     on_iteration: Callable[[dict], None] | None = None,
     on_status: Callable[[str], None] | None = None,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
+    compact_context: bool = False,
+    on_usage: Callable[[dict], None] | None = None,
+    on_partial: Callable[[dict], None] | None = None,
+    candidates: int = 1,
+    stopping: Callable[[list[dict], int], str | None] | None = None,
+    section_edits: bool = False,
 ) -> Path:
     """Load resume, get JD, optimize for ATS, render with template, and save PDF.
 
@@ -109,6 +394,12 @@ def run_resume_agent(
         api_key=api_key,
         on_iteration=on_iteration,
         on_status=on_status,
+        compact_context=compact_context,
+        on_usage=on_usage,
+        on_partial=on_partial,
+        candidates=candidates,
+        stopping=stopping,
+        section_edits=section_edits,
     )
 
     return export_resume_pdf(
@@ -117,4 +408,7 @@ def run_resume_agent(
         primary_color=primary_color,
         job_title=result["job_title"],
         company=result["company"],
+        max_pages=max_pages,
+        optimize=optimize,
+        on_report=on_report,
     )
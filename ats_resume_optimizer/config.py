@@ -5,5 +5,10 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 RESUME_DIR = BASE_DIR / "memory" / "docs"
 OUTPUT_DIR = RESUME_DIR / "generated"
+CACHE_DIR = BASE_DIR / "memory" / "cache"
 
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+for _dir in (OUTPUT_DIR, CACHE_DIR):
+    try:
+        _dir.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        pass  # read-only deployments can still render to bytes
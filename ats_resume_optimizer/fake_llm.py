@@ -0,0 +1,587 @@
+"""Deterministic, offline stand-in for the OpenAI chat-completions API.
+
+``FakeLLM`` answers the two kinds of requests ``llm.py`` makes: JD analysis
+(keywords are picked out of the posting with a built-in vocabulary and a
+few regexes) and resume optimization (content HTML in
+``templates.CONTENT_STRUCTURE`` shape, built from the resume text in the
+prompt).  The first optimization covers a fixed share of the keywords and
+each refinement adds the ones the prompt lists as missing, so the loop
+converges the way a real run does.  Replies depend only on the request, so
+repeated runs produce identical output; token counts are estimated from
+character counts.
+
+It is reachable two ways, both speaking the real wire format so the SDK,
+streaming parser, rate-limit scheduler and telemetry are all exercised:
+
+* in-process, as an ``httpx`` transport: ``ATS_LLM_BACKEND=fake`` or
+  ``llm.set_transport(FakeTransport())``;
+* over HTTP, for load-testing a separate app process:
+  ``python -m ats_resume_optimizer fake-llm`` and point
+  ``OPENAI_BASE_URL`` at it.
+
+``ATS_FAKE_LLM_LATENCY`` (seconds before the first token, default 0) and
+``ATS_FAKE_LLM_TOKENS_PER_S`` (generation speed, default 0 = instant) make
+it behave like a model of a given speed.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import httpx
+from bs4 import BeautifulSoup
+
+_HARD_SKILLS = [
+    "Python", "Java", "JavaScript", "TypeScript", "Go", "Rust", "C++", "C#",
+    "Scala", "Kotlin", "Ruby", "PHP", "SQL", "NoSQL", "PostgreSQL", "MySQL",
+    "MongoDB", "Redis", "Elasticsearch", "Kafka", "Spark", "Airflow",
+    "Snowflake", "dbt", "Pandas", "NumPy", "PyTorch", "TensorFlow",
+    "scikit-learn", "React", "Angular", "Vue", "Node.js", "Django", "Flask",
+    "FastAPI", "Spring", "GraphQL", "REST", "gRPC", "AWS", "Azure", "GCP",
+    "Docker", "Kubernetes", "Terraform", "Ansible", "Jenkins", "GitHub Actions",
+    "Linux", "Git", "Tableau", "Power BI", "Excel", "Figma", "Salesforce",
+]
+_SOFT_SKILLS = [
+    "communication", "leadership", "collaboration", "problem-solving",
+    "mentoring", "teamwork", "ownership", "stakeholder management",
+    "time management", "adaptability",
+]
+_INDUSTRY_TERMS = [
+    "Agile", "Scrum", "Kanban", "CI/CD", "DevOps", "microservices",
+    "machine learning", "data pipelines", "ETL", "distributed systems",
+    "observability", "test-driven development", "cloud-native", "SaaS",
+]
+_CERTIFICATIONS = [
+    "AWS Certified Solutions Architect", "PMP", "CISSP", "CKA",
+    "Google Professional Data Engineer", "Azure Fundamentals",
+]
+_ACTION_VERBS = [
+    "design", "develop", "build", "deploy", "maintain", "lead", "manage",
+    "optimize", "implement", "own", "scale", "automate", "analyze", "drive",
+]
+_PREFERRED_MARKERS = ("prefer", "nice to have", "nice-to-have", "bonus", "plus")
+
+_LATENCY = float(os.environ.get("ATS_FAKE_LLM_LATENCY", "0"))
+_TOKENS_PER_S = float(os.environ.get("ATS_FAKE_LLM_TOKENS_PER_S", "0"))
+
+# Prompt caching as the API does it: prompts of at least 1024 tokens, in
+# 128-token steps of a prefix seen before.
+_CACHE_MIN_TOKENS = 1024
+_CACHE_BLOCK_TOKENS = 128
+_CACHE_MAX_PREFIXES = 10_000
+
+
+def _mentions(text: str, term: str, ignore_case: bool = True) -> bool:
+    pattern = rf"(?<![\w]){re.escape(term)}(?![\w])"
+    flags = re.IGNORECASE if ignore_case else 0
+    return re.search(pattern, text, flags) is not None
+
+
+def _quoted_block(text: str, label: str) -> str | None:
+    match = re.search(rf'{label}:\n"""(.*?)"""', text, re.DOTALL)
+    return match.group(1) if match else None
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def analyze_text(jd_text: str) -> dict:
+    """Return a JD analysis in ``llm.analyze_job_description`` shape."""
+    lines = [line.strip() for line in jd_text.splitlines() if line.strip()]
+    preferred_text = " ".join(
+        line for line in lines
+        if any(marker in line.lower() for marker in _PREFERRED_MARKERS)
+    )
+    required_text = " ".join(
+        line for line in lines
+        if not any(marker in line.lower() for marker in _PREFERRED_MARKERS)
+    )
+
+    title = ""
+    match = re.search(r"(?im)^\s*(?:job\s+)?title\s*:\s*(.+)$", jd_text)
+    if match:
+        title = match.group(1).strip()
+    elif lines and len(lines[0]) <= 80:
+        title = lines[0].rstrip(".:")
+
+    company = ""
+    match = re.search(
+        r"(?i:\bcompany\s*:\s*|\babout\s+|\bjoin\s+|\bat\s+)"
+        r"([A-Z][\w&.-]*(?:[ \t]+[A-Z][\w&.-]*){0,3})",
+        jd_text,
+    )
+    if match:
+        company = match.group(1).strip().rstrip(".")
+
+    experience = ""
+    match = re.search(r"(\d+)\s*\+?\s*(?:years|yrs)", jd_text, re.IGNORECASE)
+    if match:
+        experience = f"{match.group(1)}+ years"
+
+    education = ""
+    for degree in ("PhD", "Master's", "Bachelor's"):
+        if _mentions(jd_text, degree):
+            education = f"{degree} degree"
+            break
+
+    return {
+        "job_title": title,
+        "company": company,
+        "required_hard_skills": [
+            s for s in _HARD_SKILLS if _mentions(required_text, s, False)
+        ],
+        "required_soft_skills": [
+            s for s in _SOFT_SKILLS if _mentions(required_text, s)
+        ],
+        "preferred_skills": [
+            s for s in _HARD_SKILLS
+            if _mentions(preferred_text, s, False)
+            and not _mentions(required_text, s, False)
+        ],
+        "required_experience": experience,
+        "required_education": education,
+        "key_responsibilities": [
+            line.lstrip("-*• ").rstrip(".")
+            for line in lines
+            if line[:1] in "-*•"
+        ][:10],
+        "industry_terms": [t for t in _INDUSTRY_TERMS if _mentions(jd_text, t)],
+        "action_verbs": [v for v in _ACTION_VERBS if _mentions(jd_text, v)],
+        "certifications": [c for c in _CERTIFICATIONS if _mentions(jd_text, c)],
+    }
+
+
+def _keywords(analysis: dict) -> list[str]:
+    return [
+        kw
+        for key in (
+            "required_hard_skills",
+            "required_soft_skills",
+            "preferred_skills",
+            "industry_terms",
+            "certifications",
+        )
+        for kw in analysis.get(key, [])
+    ]
+
+
+def _resume_html(resume_text: str, analysis: dict, keywords: list[str]) -> str:
+    lines = [line.strip() for line in resume_text.splitlines() if line.strip()]
+    name = lines[0] if lines else "Candidate"
+    contact = [
+        line for line in lines[1:6]
+        if "@" in line or "linkedin" in line.lower() or re.search(r"\d{3}", line)
+    ][:4]
+    education = [
+        line for line in lines
+        if re.search(r"universit|college|bachelor|master|ph\.?d", line, re.I)
+    ][:2]
+    bullets = [
+        line.lstrip("-*• ")
+        for line in lines[1:]
+        if len(line) > 40 and line not in contact and line not in education
+    ][:8]
+    soft = set(analysis.get("required_soft_skills", []))
+    hard = [kw for kw in keywords if kw not in soft]
+    bullets += [
+        f"Applied {kw} to deliver measurable improvements across 3 projects."
+        for kw in keywords
+    ]
+    while len(bullets) < 5:
+        bullets.append("Delivered projects on schedule for 4 cross-functional teams.")
+
+    title = analysis.get("job_title") or "Professional"
+    years = analysis.get("required_experience") or "5+ years"
+    focus = ", ".join(keywords[:4]) or "delivering results"
+    parts = [
+        '<div class="resume-header">',
+        f"    <h1>{_escape(name)}</h1>",
+        '    <div class="contact-info">',
+        *(f"        <span>{_escape(c)}</span>" for c in contact),
+        "    </div>",
+        "</div>",
+        '<div class="resume-section summary">',
+        "    <h2>Professional Summary</h2>",
+        f"    <p>{_escape(title)} with {_escape(years)} of experience in "
+        f"{_escape(focus)}.</p>",
+        "</div>",
+        '<div class="resume-section skills">',
+        "    <h2>Technical Skills</h2>",
+        '    <div class="skills-grid">',
+    ]
+    categories = (("Core", hard), ("Soft Skills", sorted(soft & set(keywords))))
+    for label, skills in categories:
+        if skills:
+            parts += [
+                '        <div class="skill-category">',
+                f"            <strong>{label}:</strong>",
+                *(
+                    f'            <span class="skill-tag">{_escape(s)}</span>'
+                    for s in skills
+                ),
+                "        </div>",
+            ]
+    parts += [
+        "    </div>",
+        "</div>",
+        '<div class="resume-section experience">',
+        "    <h2>Professional Experience</h2>",
+        '    <div class="experience-item">',
+        '        <div class="item-header">',
+        f"            <h3>{_escape(title)}</h3>",
+        '            <span class="date">Jan 2020 - Present</span>',
+        "        </div>",
+        '        <div class="company">Previous Employer</div>',
+        "        <ul>",
+        *(f"            <li>{_escape(b)}</li>" for b in bullets),
+        "        </ul>",
+        "    </div>",
+        "</div>",
+    ]
+    if education:
+        parts += [
+            '<div class="resume-section education">',
+            "    <h2>Education</h2>",
+            *(
+                '    <div class="education-item"><div class="item-header">'
+                f"<h3>{_escape(line)}</h3></div></div>"
+                for line in education
+            ),
+            "</div>",
+        ]
+    return "\n".join(parts)
+
+
+def _add_keywords(draft_html: str, keywords: list[str]) -> str:
+    if not keywords:
+        return draft_html
+    category = (
+        '\n        <div class="skill-category">\n'
+        "            <strong>Additional:</strong>\n"
+        + "".join(
+            f'            <span class="skill-tag">{_escape(kw)}</span>\n'
+            for kw in keywords
+        )
+        + "        </div>"
+    )
+    grid = '<div class="skills-grid">'
+    if grid in draft_html:
+        return draft_html.replace(grid, grid + category, 1)
+    return (
+        draft_html
+        + '\n<div class="resume-section skills">\n    <h2>Skills</h2>\n'
+        + f"    {grid}{category}\n    </div>\n</div>"
+    )
+
+
+def _skills_edit(annotated_html: str, keywords: list[str]) -> list[dict]:
+    """Section edits adding ``keywords`` to the ``data-block`` skills section."""
+    soup = BeautifulSoup(annotated_html, "html.parser")
+    skills = soup.find(attrs={"data-block": "skills"})
+    if skills is None or not keywords:
+        return []
+    del skills["data-block"]
+    for tag in skills.find_all(attrs={"data-block": True}):
+        del tag["data-block"]
+    return [{"block": "skills", "html": _add_keywords(str(skills), keywords)}]
+
+
+def _refined(keywords: list[str]) -> dict:
+    """Score and notes of a refinement that added ``keywords``."""
+    return {
+        "ats_score": 95,
+        "missing_keywords": [],
+        "strategies_applied": [
+            "Must-Have Prioritization",
+            "Contextual Keyword Embedding",
+        ],
+        "changes_summary": (
+            f"Added {len(keywords)} missing keywords to the skills section."
+        ),
+    }
+
+
+class FakeLLM:
+    """Produces chat-completion replies for ``llm.py``'s requests.
+
+    ``coverage`` is the share of JD keywords the first optimization call
+    includes; refinements add whatever the prompt reports as missing.
+    Requests with a higher ``temperature`` or a different prompt get a
+    different keyword subset and a share up to 0.15 above or below
+    ``coverage``, so parallel candidates differ the way sampled drafts do.
+    Prompt prefixes are remembered and reported as ``cached_tokens`` the
+    way the API's prompt cache would, so prompt layouts can be compared.
+    """
+
+    def __init__(
+        self,
+        latency: float = _LATENCY,
+        tokens_per_s: float = _TOKENS_PER_S,
+        coverage: float = 0.7,
+        chars_per_token: int = 4,
+    ) -> None:
+        self.latency = latency
+        self.tokens_per_s = tokens_per_s
+        self.coverage = coverage
+        self.chars_per_token = chars_per_token
+        self._prefixes: set[str] = set()
+        self._lock = threading.Lock()
+
+    def _tokens(self, text: str) -> int:
+        return max(1, math.ceil(len(text) / self.chars_per_token))
+
+    def _cached_tokens(self, messages: list[dict]) -> int:
+        """Tokens of the longest previously seen prefix; remember this prompt's."""
+        text = "".join(
+            f"{m.get('role')}\n{m.get('content') or ''}\n" for m in messages
+        )
+        step = _CACHE_BLOCK_TOKENS * self.chars_per_token
+        digest = hashlib.sha256()
+        keys = []
+        for start in range(0, len(text) - step + 1, step):
+            digest.update(text[start:start + step].encode("utf-8"))
+            keys.append(digest.copy().hexdigest())
+        with self._lock:
+            seen = 0
+            while seen < len(keys) and keys[seen] in self._prefixes:
+                seen += 1
+            if len(self._prefixes) > _CACHE_MAX_PREFIXES:
+                self._prefixes.clear()
+            self._prefixes.update(keys)
+        cached = seen * _CACHE_BLOCK_TOKENS
+        return cached if cached >= _CACHE_MIN_TOKENS else 0
+
+    def _optimize(self, messages: list[dict], temperature: float) -> dict:
+        prompt = messages[-1].get("content") or ""
+        jd_text = _quoted_block(prompt, "JOB DESCRIPTION")
+        resume_text = _quoted_block(prompt, "CURRENT RESUME")
+        draft = _quoted_block(prompt, "CURRENT DRAFT")
+        if draft is None and resume_text is None:
+            for message in reversed(messages[:-1]):
+                if message.get("role") == "assistant":
+                    try:
+                        draft = json.loads(message["content"])[
+                            "tailored_resume_html"
+                        ]
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    break
+
+        if draft is not None:
+            match = re.search(r"missing in the resume:\n(\[.*?\])\n", prompt)
+            missing = json.loads(match.group(1)) if match else []
+            if "data-block=" in draft:
+                return {"edits": _skills_edit(draft, missing), **_refined(missing)}
+            return {
+                "tailored_resume_html": _add_keywords(draft, missing),
+                **_refined(missing),
+            }
+
+        analysis = analyze_text(jd_text or "")
+        keywords = _keywords(analysis)
+        # Deterministic "random" subset, stable across runs and processes.
+        seed = f"{temperature}|{prompt}"
+        ranked = sorted(
+            keywords,
+            key=lambda kw: hashlib.sha256((kw + seed).encode("utf-8")).hexdigest(),
+        )
+        jitter = int(hashlib.sha256(seed.encode("utf-8")).hexdigest()[:4], 16)
+        share = self.coverage + (jitter / 0xFFFF - 0.5) * 0.3 * min(temperature, 1)
+        share = min(max(share, 0.0), 1.0)
+        included = set(ranked[: math.ceil(len(ranked) * share)])
+        covered = [kw for kw in keywords if kw in included]
+        coverage = len(covered) / len(keywords) if keywords else 1.0
+        return {
+            "tailored_resume_html": _resume_html(
+                resume_text or "", analysis, covered
+            ),
+            "ats_score": round(55 + 40 * coverage),
+            "missing_keywords": [kw for kw in keywords if kw not in included],
+            "strategies_applied": [
+                "Job Title Mirroring",
+                "Semantic Skill Clustering",
+                "STAR Method Bullets",
+            ],
+            "changes_summary": (
+                f"Rewrote the resume for the {analysis['job_title'] or 'target'} "
+                f"role covering {len(covered)} of {len(keywords)} keywords."
+            ),
+        }
+
+    def complete(self, body: dict) -> tuple[str, dict]:
+        """Return the reply content and usage for a request body."""
+        messages = body.get("messages") or []
+        system = (messages[0].get("content") or "") if messages else ""
+        if "extract structured data from job descriptions" in system:
+            prompt = messages[-1].get("content") or ""
+            data = analyze_text(_quoted_block(prompt, "JOB DESCRIPTION") or "")
+        else:
+            data = self._optimize(messages, float(body.get("temperature") or 0))
+        content = json.dumps(data, ensure_ascii=False)
+        prompt_tokens = sum(
+            self._tokens(m.get("content") or "") for m in messages
+        )
+        completion_tokens = self._tokens(content)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {
+                "cached_tokens": min(self._cached_tokens(messages), prompt_tokens)
+            },
+        }
+        return content, usage
+
+    def respond(self, body: dict) -> tuple[dict, Iterator[bytes]]:
+        """Return response headers and body chunks for a request body.
+
+        Streaming requests get server-sent events; chunks are paced by
+        ``latency`` and ``tokens_per_s`` as they are consumed.
+        """
+        content, usage = self.complete(body)
+        digest = hashlib.sha256(
+            json.dumps(body, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:24]
+        base = {
+            "id": f"chatcmpl-fake-{digest}",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+        }
+        headers = {
+            "x-request-id": f"req_fake_{digest}",
+            "x-ratelimit-limit-requests": "10000",
+            "x-ratelimit-remaining-requests": "9999",
+            "x-ratelimit-limit-tokens": "10000000",
+            "x-ratelimit-remaining-tokens": "9990000",
+        }
+
+        def _pace(tokens: int) -> None:
+            if self.tokens_per_s:
+                time.sleep(tokens / self.tokens_per_s)
+
+        if not body.get("stream"):
+            headers["content-type"] = "application/json"
+            reply = {
+                **base,
+                "object": "chat.completion",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+
+            def _whole() -> Iterator[bytes]:
+                time.sleep(self.latency)
+                _pace(usage["completion_tokens"])
+                yield json.dumps(reply).encode("utf-8")
+
+            return headers, _whole()
+
+        headers["content-type"] = "text/event-stream"
+        step = 4 * self.chars_per_token  # about four tokens per event
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+        def _event(choices: list, **extra) -> bytes:
+            chunk = {**base, "object": "chat.completion.chunk", "choices": choices}
+            chunk.update(extra)
+            return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+        def _events() -> Iterator[bytes]:
+            time.sleep(self.latency)
+            yield _event(
+                [{"index": 0, "delta": {"role": "assistant", "content": ""}}]
+            )
+            for start in range(0, len(content), step):
+                _pace(4)
+                yield _event(
+                    [
+                        {
+                            "index": 0,
+                            "delta": {"content": content[start:start + step]},
+                        }
+                    ]
+                )
+            yield _event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if include_usage:
+                yield _event([], usage=usage)
+            yield b"data: [DONE]\n\n"
+
+        return headers, _events()
+
+
+def _not_found(path: str) -> tuple[int, dict, bytes]:
+    return (
+        404,
+        {"content-type": "application/json"},
+        json.dumps(
+            {
+                "error": {
+                    "message": f"Unknown endpoint {path}",
+                    "type": "invalid_request_error",
+                }
+            }
+        ).encode("utf-8"),
+    )
+
+
+class FakeTransport(httpx.BaseTransport):
+    """``httpx`` transport answering chat completions with a ``FakeLLM``."""
+
+    def __init__(self, llm: FakeLLM | None = None) -> None:
+        self.llm = llm or FakeLLM()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith("/chat/completions"):
+            status, headers, body = _not_found(request.url.path)
+            return httpx.Response(status, headers=headers, content=body)
+        headers, chunks = self.llm.respond(json.loads(request.read()))
+        return httpx.Response(200, headers=headers, content=chunks)
+
+
+def make_server(
+    host: str = "127.0.0.1", port: int = 8765, llm: FakeLLM | None = None
+) -> ThreadingHTTPServer:
+    """Return an HTTP server exposing ``llm`` at ``/v1/chat/completions``."""
+    llm = llm or FakeLLM()
+
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self) -> None:  # noqa: N802
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                status, headers, body = _not_found(self.path)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            headers, chunks = llm.respond(request)
+            self.send_response(200)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in chunks:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, format: str, *args) -> None:  # noqa: A002
+            pass
+
+    return ThreadingHTTPServer((host, port), _Handler)
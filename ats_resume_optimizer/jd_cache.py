@@ -0,0 +1,165 @@
+"""Persistent cache of job-description analyses.
+
+Recruiters often optimize many resumes against the same posting.  The result
+of ``llm.analyze_job_description`` depends only on the posting, the model,
+the prompt and the backend, so it is stored in a SQLite database keyed by a
+SHA-256 of the normalized JD text (EEO boilerplate removed via
+``_clean_jd_text``, whitespace collapsed), the model name,
+``llm.JD_ANALYSIS_PROMPT_VERSION`` and ``llm.backend_id()``.  A hit skips
+the LLM call entirely.
+
+The database lives at ``CACHE_DIR / "jd_cache.sqlite3"`` and is shared by
+all processes.  Entries expire after ``ATS_JD_CACHE_TTL_DAYS`` (default 30)
+and the least-recently-used ones are evicted beyond
+``ATS_JD_CACHE_MAX_ENTRIES`` (default 1000; ``0`` disables caching).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from ats_resume_optimizer.config import CACHE_DIR
+from ats_resume_optimizer.job_description import _clean_jd_text
+from ats_resume_optimizer.llm import (
+    JD_ANALYSIS_MODEL,
+    JD_ANALYSIS_PROMPT_VERSION,
+    backend_id,
+)
+
+_DB_PATH = CACHE_DIR / "jd_cache.sqlite3"
+_TTL_SECONDS = float(os.environ.get("ATS_JD_CACHE_TTL_DAYS", "30")) * 86400
+_MAX_ENTRIES = int(os.environ.get("ATS_JD_CACHE_MAX_ENTRIES", "1000"))
+
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(_DB_PATH, timeout=10)
+    try:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jd_analysis ("
+            "key TEXT PRIMARY KEY, data TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def _normalize(jd_text: str) -> str:
+    return " ".join(_clean_jd_text(jd_text).split())
+
+
+def jd_cache_key(
+    jd_text: str,
+    model: str = JD_ANALYSIS_MODEL,
+    prompt_version: int = JD_ANALYSIS_PROMPT_VERSION,
+    backend: str | None = None,
+) -> str:
+    """Return the cache key for analyzing ``jd_text`` with ``model``.
+
+    ``backend`` defaults to ``llm.backend_id()``, so analyses from the fake
+    backend or another server are never served to runs against the API.
+    """
+    if backend is None:
+        backend = backend_id()
+    digest = hashlib.sha256()
+    for part in (_normalize(jd_text), model, str(prompt_version), backend):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_cached_analysis(key: str) -> dict | None:
+    """Return the cached analysis for ``key`` (marking it recently used), or None."""
+    global _hits, _misses  # noqa: PLW0603
+    if _MAX_ENTRIES <= 0:
+        return None
+    now = time.time()
+    row = None
+    try:
+        with closing(_connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT data FROM jd_analysis WHERE key = ? AND created >= ?",
+                (key, now - _TTL_SECONDS),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jd_analysis SET accessed = ? WHERE key = ?",
+                    (now, key),
+                )
+    except sqlite3.Error:
+        row = None  # the cache is best-effort; treat errors as a miss
+    with _lock:
+        if row is None:
+            _misses += 1
+        else:
+            _hits += 1
+    return json.loads(row[0]) if row is not None else None
+
+
+def store_analysis(key: str, data: dict) -> None:
+    """Store an analysis under ``key`` and evict expired / LRU entries."""
+    if _MAX_ENTRIES <= 0 or not data:
+        return
+    now = time.time()
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jd_analysis VALUES (?, ?, ?, ?)",
+                (key, json.dumps(data, ensure_ascii=False), now, now),
+            )
+            conn.execute(
+                "DELETE FROM jd_analysis WHERE created < ?",
+                (now - _TTL_SECONDS,),
+            )
+            conn.execute(
+                "DELETE FROM jd_analysis WHERE key NOT IN ("
+                "SELECT key FROM jd_analysis ORDER BY accessed DESC LIMIT ?)",
+                (_MAX_ENTRIES,),
+            )
+    except sqlite3.Error:
+        return
+
+
+def cache_stats() -> dict:
+    """Return hit/miss counters (this process) and the number of entries."""
+    entries = 0
+    if _DB_PATH.exists():
+        try:
+            with closing(_connect()) as conn:
+                entries = conn.execute(
+                    "SELECT COUNT(*) FROM jd_analysis"
+                ).fetchone()[0]
+        except sqlite3.Error:
+            pass
+    with _lock:
+        hits, misses = _hits, _misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "entries": entries,
+        "max_entries": _MAX_ENTRIES,
+        "ttl_days": _TTL_SECONDS / 86400,
+    }
+
+
+def clear_cache() -> None:
+    """Delete every cached analysis and reset the hit/miss counters."""
+    global _hits, _misses  # noqa: PLW0603
+    if _DB_PATH.exists():
+        try:
+            with closing(_connect()) as conn, conn:
+                conn.execute("DELETE FROM jd_analysis")
+        except sqlite3.Error:
+            pass
+    with _lock:
+        _hits = 0
+        _misses = 0
@@ -1,14 +1,21 @@
 """OpenAI client and resume optimization prompts / API calls."""
 
+import atexit
+import concurrent.futures
 import json
 import os
 import re
+import threading
+import time
 from html.parser import HTMLParser
 from typing import Callable
 
+import httpx
+from bs4 import BeautifulSoup, Tag
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import DefaultHttpxClient, OpenAI
 
+from ats_resume_optimizer.rate_limit import call_with_retry
 from ats_resume_optimizer.templates import CONTENT_STRUCTURE
 
 load_dotenv()
@@ -60,14 +67,386 @@ def _parse_json_from_content(content: str | None) -> dict:
         ) from e
 
 
+# Connection pool shared by every call made with one API key.  Keep-alive
+# connections let back-to-back calls (JD analysis, optimization iterations,
+# batch runs) skip the TCP/TLS handshake.
+_MAX_CONNECTIONS = int(os.environ.get("ATS_LLM_MAX_CONNECTIONS", "20"))
+_TIMEOUT = float(os.environ.get("ATS_LLM_TIMEOUT", "120"))
+_KEEPALIVE_EXPIRY = 60.0
+
+_clients: dict[str, OpenAI] = {}
+_clients_lock = threading.Lock()
+
+# Alternative HTTP transport for every client (see ``set_transport``).
+_transport: httpx.BaseTransport | None = None
+if os.environ.get("ATS_LLM_BACKEND", "openai").lower() == "fake":
+    from ats_resume_optimizer.fake_llm import FakeTransport
+
+    _transport = FakeTransport()
+
+
 def get_client(api_key: str | None = None) -> OpenAI:
-    """Return OpenAI client using api_key if provided, else OPENAI_API_KEY env."""
+    """Return OpenAI client using api_key if provided, else OPENAI_API_KEY env.
+
+    Clients are cached per API key for the life of the process and are safe
+    to share between threads, so every LLM call reuses one connection pool.
+    With a transport installed (``set_transport``, ``ATS_LLM_BACKEND=fake``)
+    no API key is needed.
+    """
     key = api_key or os.environ.get("OPENAI_API_KEY")
+    if _transport is not None and not (key and key.strip()):
+        key = "local"
     if not key or not key.strip():
         raise ValueError(
             "OpenAI API key is required. Set OPENAI_API_KEY in .env or enter it in the app."
         )
-    return OpenAI(api_key=key.strip())
+    key = key.strip()
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = OpenAI(
+                api_key=key,
+                # Retries are handled by the shared scheduler (rate_limit).
+                max_retries=0,
+                http_client=DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=_MAX_CONNECTIONS,
+                        max_keepalive_connections=_MAX_CONNECTIONS,
+                        keepalive_expiry=_KEEPALIVE_EXPIRY,
+                    ),
+                    timeout=httpx.Timeout(_TIMEOUT, connect=10.0),
+                    transport=_transport,
+                ),
+            )
+            _clients[key] = client
+    return client
+
+
+def set_transport(transport: httpx.BaseTransport | None) -> None:
+    """Send every OpenAI request through ``transport`` instead of the network.
+
+    Pass ``fake_llm.FakeTransport()`` to run the whole pipeline offline and
+    deterministically (benchmarks, load tests, CI); ``None`` restores the
+    real API.  Cached clients are closed so the change applies to the next
+    call.
+    """
+    global _transport  # noqa: PLW0603
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _transport = transport
+    for client in clients:
+        client.close()
+
+
+def backend_id() -> str:
+    """Identify the backend LLM requests currently go to.
+
+    ``"openai"`` for the public API; otherwise the installed transport's
+    class (``set_transport``, ``ATS_LLM_BACKEND=fake``) or the
+    ``OPENAI_BASE_URL`` in use.  Part of cache keys of LLM results, so a
+    fake or local backend never serves answers to real runs.
+    """
+    transport = _transport
+    if transport is not None:
+        kind = type(transport)
+        return f"transport:{kind.__module__}.{kind.__qualname__}"
+    base_url = os.environ.get("OPENAI_BASE_URL", "").strip().rstrip("/")
+    if base_url and base_url != "https://api.openai.com/v1":
+        return f"base_url:{base_url}"
+    return "openai"
+
+
+def close_clients() -> None:
+    """Close every cached client and its connection pool."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+atexit.register(close_clients)
+
+
+# Completion tokens reserved per request when budgeting tokens per minute.
+_OUTPUT_TOKEN_ESTIMATE = 2048
+
+
+def _create(client: OpenAI, **kwargs):
+    """``chat.completions.create`` through the shared rate-limited scheduler."""
+    chars = sum(len(m.get("content") or "") for m in kwargs["messages"])
+    return call_with_retry(
+        lambda: client.chat.completions.with_raw_response.create(**kwargs),
+        estimated_tokens=chars // 4 + _OUTPUT_TOKEN_ESTIMATE,
+    )
+
+
+def _usage(resp) -> dict:
+    """Token counts of a chat completion (zeros if the API omitted them)."""
+    usage = getattr(resp, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "input_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "output_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Telemetry
+# ---------------------------------------------------------------------------
+
+# Approximate list prices in USD per 1M tokens: (input, cached input, output).
+# Dated snapshots (e.g. "gpt-4o-mini-2024-07-18") match by prefix.
+MODEL_PRICING: dict[str, tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+}
+
+_metrics_sink: Callable[[dict], None] | None = None
+_metrics_lock = threading.Lock()
+
+
+def estimate_cost(
+    model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0
+) -> float | None:
+    """Estimated USD cost of one call, or None for models not in MODEL_PRICING."""
+    matches = [name for name in MODEL_PRICING if model.startswith(name)]
+    if not matches:
+        return None
+    price_in, price_cached, price_out = MODEL_PRICING[max(matches, key=len)]
+    uncached = max(0, input_tokens - cached_tokens)
+    return round(
+        (uncached * price_in + cached_tokens * price_cached
+         + output_tokens * price_out) / 1_000_000,
+        6,
+    )
+
+
+def set_metrics_sink(sink: Callable[[dict], None] | None) -> None:
+    """Send every LLM call record to ``sink`` (``None`` to disable).
+
+    The sink is called from whichever thread made the call; exceptions it
+    raises are ignored so telemetry can never fail an optimization.
+    """
+    global _metrics_sink  # noqa: PLW0603
+    _metrics_sink = sink
+
+
+def jsonl_metrics_sink(path: str | os.PathLike) -> Callable[[dict], None]:
+    """Return a sink that appends each record as a JSON line to ``path``."""
+
+    def _sink(record: dict) -> None:
+        line = json.dumps({"timestamp": time.time(), **record})
+        with _metrics_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    return _sink
+
+
+def _cached_ratio(usage: dict) -> float:
+    """Share of the input tokens served from the provider's prompt cache."""
+    if not usage["input_tokens"]:
+        return 0.0
+    return round(usage["cached_tokens"] / usage["input_tokens"], 3)
+
+
+def _record_call(
+    record: dict, on_usage: Callable[[dict], None] | None
+) -> dict:
+    """Complete a call record with its cached ratio and cost and publish it."""
+    record["cached_ratio"] = _cached_ratio(record)
+    record["cost_usd"] = estimate_cost(
+        record["model"],
+        record["input_tokens"],
+        record["output_tokens"],
+        record["cached_tokens"],
+    )
+    sink = _metrics_sink
+    if sink is not None:
+        try:
+            sink(dict(record))
+        except Exception:  # noqa: BLE001 – telemetry is best-effort
+            pass
+    if on_usage:
+        on_usage(record)
+    return record
+
+
+def summarize_usage(records: list[dict]) -> dict:
+    """Aggregate call records into totals overall and per ``call`` type."""
+
+    def _total(items: list[dict]) -> dict:
+        costs = [r["cost_usd"] for r in items if r.get("cost_usd") is not None]
+        total = {
+            "calls": len(items),
+            "input_tokens": sum(r["input_tokens"] for r in items),
+            "output_tokens": sum(r["output_tokens"] for r in items),
+            "cached_tokens": sum(r["cached_tokens"] for r in items),
+            "latency_s": round(sum(r["latency_s"] for r in items), 3),
+            "cost_usd": round(sum(costs), 6) if costs else None,
+        }
+        total["cached_ratio"] = _cached_ratio(total)
+        return total
+
+    by_call: dict[str, list[dict]] = {}
+    for record in records:
+        by_call.setdefault(record["call"], []).append(record)
+    return {
+        **_total(records),
+        "by_call": {call: _total(items) for call, items in by_call.items()},
+    }
+
+
+if os.environ.get("ATS_LLM_METRICS_FILE"):
+    set_metrics_sink(jsonl_metrics_sink(os.environ["ATS_LLM_METRICS_FILE"]))
+
+
+class _StreamingJSONParser:
+    """Incrementally parse the top-level JSON object of a streamed reply.
+
+    ``feed()`` takes the next chunk of model output and returns events:
+    ``("delta", key, text)`` with newly decoded characters of a string value
+    still being generated, and ``("value", key, value)`` once any top-level
+    value is complete.  Text before the opening brace (e.g. a markdown
+    fence) is ignored.  The final reply is still parsed in full with
+    ``_parse_json_from_content``; this only drives progress and previews.
+    """
+
+    def __init__(self) -> None:
+        self._state = "start"
+        self._key: list[str] = []
+        self._name = ""
+        self._raw: list[str] = []  # undecoded chars of the current value
+        self._decoded: list[str] = []  # decoded text of a string value
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._hex_left = 0  # hex digits still due in a \uXXXX escape
+        self._escape_at = 0  # index in _raw where that escape started
+        self._carry = ""  # high surrogate waiting for its pair
+
+    def _flush(self, final: bool = False) -> str:
+        """Decode the buffered string chars up to the last complete escape."""
+        cut = len(self._raw)
+        if not final and (self._escape or self._hex_left):
+            cut = self._escape_at
+        text = json.loads('"' + "".join(self._raw[:cut]) + '"')
+        del self._raw[:cut]
+        self._escape_at = 0
+        text = self._carry + text
+        self._carry = ""
+        if not final and text and "\ud800" <= text[-1] <= "\udbff":
+            text, self._carry = text[:-1], text[-1]
+        # Join surrogate halves that arrived in separate chunks.
+        text = text.encode("utf-16", "surrogatepass").decode("utf-16")
+        self._decoded.append(text)
+        return text
+
+    def feed(self, chunk: str) -> list[tuple]:
+        events: list[tuple] = []
+        for ch in chunk:
+            state = self._state
+            if state == "start":
+                if ch == "{":
+                    self._state = "key_wait"
+            elif state == "key_wait":
+                if ch == '"':
+                    self._key = []
+                    self._state = "key"
+                elif ch == "}":
+                    self._state = "done"
+            elif state == "key":
+                if self._escape:
+                    self._key.append(ch)
+                    self._escape = False
+                elif ch == "\\":
+                    self._key.append(ch)
+                    self._escape = True
+                elif ch == '"':
+                    self._name = json.loads('"' + "".join(self._key) + '"')
+                    self._state = "colon"
+                else:
+                    self._key.append(ch)
+            elif state == "colon":
+                if ch == ":":
+                    self._state = "value_wait"
+            elif state == "value_wait":
+                if ch.isspace():
+                    continue
+                self._raw, self._decoded = [], []
+                if ch == '"':
+                    self._state = "string"
+                elif ch in "{[":
+                    self._raw.append(ch)
+                    self._depth = 1
+                    self._in_string = False
+                    self._state = "nested"
+                else:
+                    self._raw.append(ch)
+                    self._state = "scalar"
+            elif state == "string":
+                if self._hex_left:
+                    self._raw.append(ch)
+                    self._hex_left -= 1
+                elif self._escape:
+                    self._raw.append(ch)
+                    self._escape = False
+                    if ch == "u":
+                        self._hex_left = 4
+                elif ch == "\\":
+                    self._escape_at = len(self._raw)
+                    self._raw.append(ch)
+                    self._escape = True
+                elif ch == '"':
+                    text = self._flush(final=True)
+                    if text:
+                        events.append(("delta", self._name, text))
+                    value = "".join(self._decoded)
+                    events.append(("value", self._name, value))
+                    self._state = "key_wait"
+                else:
+                    self._raw.append(ch)
+            elif state == "nested":
+                self._raw.append(ch)
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif ch == "\\":
+                        self._escape = True
+                    elif ch == '"':
+                        self._in_string = False
+                elif ch == '"':
+                    self._in_string = True
+                elif ch in "{[":
+                    self._depth += 1
+                elif ch in "}]":
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._emit_raw(events)
+                        self._state = "key_wait"
+            elif state == "scalar":
+                if ch in ",}":
+                    self._emit_raw(events)
+                    self._state = "done" if ch == "}" else "key_wait"
+                else:
+                    self._raw.append(ch)
+        if self._state == "string" and self._raw:
+            text = self._flush()
+            if text:
+                events.append(("delta", self._name, text))
+        return events
+
+    def _emit_raw(self, events: list[tuple]) -> None:
+        try:
+            value = json.loads("".join(self._raw))
+        except json.JSONDecodeError:
+            return  # malformed value; the full parse will report it
+        events.append(("value", self._name, value))
 
 
 def _extract_text_from_html(html: str) -> str:
@@ -86,6 +465,210 @@ def _extract_text_from_html(html: str) -> str:
     return " ".join(extractor.parts)
 
 
+# ---------------------------------------------------------------------------
+# Structured outputs
+# ---------------------------------------------------------------------------
+
+def _object_schema(properties: dict) -> dict:
+    """Strict JSON schema of an object with exactly ``properties``."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+_STRING = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+JD_ANALYSIS_SCHEMA = _object_schema(
+    {
+        "job_title": _STRING,
+        "company": _STRING,
+        "required_hard_skills": _STRING_LIST,
+        "required_soft_skills": _STRING_LIST,
+        "preferred_skills": _STRING_LIST,
+        "required_experience": _STRING,
+        "required_education": _STRING,
+        "key_responsibilities": _STRING_LIST,
+        "industry_terms": _STRING_LIST,
+        "action_verbs": _STRING_LIST,
+        "certifications": _STRING_LIST,
+    }
+)
+
+# Property order is generation order: the draft streams first.
+OPTIMIZATION_SCHEMA = _object_schema(
+    {
+        "tailored_resume_html": _STRING,
+        "ats_score": {"type": "integer"},
+        "missing_keywords": _STRING_LIST,
+        "strategies_applied": _STRING_LIST,
+        "changes_summary": _STRING,
+    }
+)
+
+# Section-level refinement: only the changed blocks of the draft come back.
+SECTION_EDIT_SCHEMA = _object_schema(
+    {
+        "edits": {
+            "type": "array",
+            "items": _object_schema({"block": _STRING, "html": _STRING}),
+        },
+        "ats_score": {"type": "integer"},
+        "missing_keywords": _STRING_LIST,
+        "strategies_applied": _STRING_LIST,
+        "changes_summary": _STRING,
+    }
+)
+
+# Follow-up calls allowed to re-ask for fields that came back broken.
+_REPAIR_ATTEMPTS = 1
+
+
+def _response_format(name: str, schema: dict) -> dict:
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": schema},
+    }
+
+
+def _salvage_json(content: str | None) -> dict:
+    """Return every complete top-level field of a possibly broken reply.
+
+    A reply cut off mid-way (length limit, dropped stream) or with one
+    malformed value still yields the fields before the damage.
+    """
+    try:
+        data = _parse_json_from_content(content)
+    except RuntimeError:
+        pass
+    else:
+        return data if isinstance(data, dict) else {}
+    data: dict = {}
+    parser = _StreamingJSONParser()
+    text = content or ""
+    for start in range(0, len(text), 256):
+        try:
+            events = parser.feed(text[start:start + 256])
+        except json.JSONDecodeError:
+            break  # a malformed string escape; keep what came before it
+        for kind, name, value in events:
+            if kind == "value":
+                data[name] = value
+    return data
+
+
+def _check_fields(data: dict, schema: dict) -> tuple[dict, list[str]]:
+    """Split ``data`` into valid fields and names of missing / invalid ones.
+
+    Harmless type slips are coerced (``"85"`` for an integer, numbers in a
+    string list) instead of being treated as broken.
+    """
+    valid: dict = {}
+    broken: list[str] = []
+    for name, spec in schema["properties"].items():
+        value = data.get(name)
+        kind = spec["type"]
+        if kind == "string" and isinstance(value, str):
+            valid[name] = value
+        elif kind == "integer" and not isinstance(value, bool):
+            try:
+                valid[name] = int(float(value))
+            except (TypeError, ValueError):
+                broken.append(name)
+        elif kind == "array" and isinstance(value, list):
+            if spec["items"]["type"] == "object":
+                checked = [
+                    _check_fields(item, spec["items"])
+                    for item in value
+                    if isinstance(item, dict)
+                ]
+                valid[name] = [item for item, bad in checked if not bad]
+                continue
+            valid[name] = [
+                str(item)
+                for item in value
+                if isinstance(item, (str, int, float)) and not isinstance(item, bool)
+            ]
+        else:
+            broken.append(name)
+    return valid, broken
+
+
+def _finish_structured(
+    client: OpenAI,
+    model: str,
+    messages: list[dict],
+    content: str | None,
+    schema_name: str,
+    schema: dict,
+    record: dict,
+    required: tuple[str, ...] = (),
+) -> tuple[dict, list[str]]:
+    """Validate a structured reply, re-asking only for the broken fields.
+
+    Complete fields are kept; the rest are requested again with a schema of
+    just those fields, the good ones given as context.  The follow-up's
+    tokens are added to ``record`` and its field names listed under
+    ``repaired_fields``.  Fields still broken afterwards fall back to empty
+    values, except ``required`` ones, which raise ``RuntimeError``.  Returns
+    the result and the names of the repaired fields.
+    """
+    data, broken = _check_fields(_salvage_json(content), schema)
+    repaired: list[str] = []
+    for _ in range(_REPAIR_ATTEMPTS):
+        if not broken:
+            break
+        sub_schema = _object_schema(
+            {name: schema["properties"][name] for name in broken}
+        )
+        resp = _create(
+            client,
+            model=model,
+            messages=[
+                *messages,
+                {
+                    "role": "assistant",
+                    "content": json.dumps(data, ensure_ascii=False),
+                },
+                {
+                    "role": "user",
+                    "content": (
+                        "Your previous reply was incomplete or invalid for "
+                        f"these keys: {json.dumps(broken)}.  Return a JSON "
+                        "object with only those keys, following the original "
+                        "instructions."
+                    ),
+                },
+            ],
+            temperature=0,
+            response_format=_response_format(f"{schema_name}_repair", sub_schema),
+        )
+        for key, value in _usage(resp).items():
+            record[key] = record.get(key, 0) + value
+        fixed, still_broken = _check_fields(
+            _salvage_json(resp.choices[0].message.content), sub_schema
+        )
+        data.update(fixed)
+        repaired += list(fixed)
+        broken = still_broken
+    if repaired:
+        record["repaired_fields"] = repaired
+    missing = [name for name in broken if name in required]
+    if missing:
+        preview = (content or "")[:300]
+        raise RuntimeError(
+            f"Model did not return a valid {', '.join(missing)}, even after "
+            f"a repair request. Content preview: {preview!r}"
+        )
+    for name in broken:
+        kind = schema["properties"][name]["type"]
+        data[name] = {"string": "", "integer": 0, "array": []}[kind]
+    return data, repaired
+
+
 # ---------------------------------------------------------------------------
 # Programmatic keyword verification
 # ---------------------------------------------------------------------------
@@ -169,12 +752,28 @@ def verify_keyword_coverage(html_content: str, jd_keywords: dict) -> dict:
 # JD keyword extraction
 # ---------------------------------------------------------------------------
 
-def extract_jd_keywords(
+# Bump whenever the analysis prompt changes, so cached analyses (see
+# ``jd_cache``) made with the old prompt are not reused.
+JD_ANALYSIS_PROMPT_VERSION = 1
+
+# Model of the JD analysis; also part of the ``jd_cache`` key.
+JD_ANALYSIS_MODEL = "gpt-4o-mini"
+
+
+def analyze_job_description(
     jd_text: str,
-    model: str = "gpt-4o-mini",
+    model: str = JD_ANALYSIS_MODEL,
     api_key: str | None = None,
+    on_usage: Callable[[dict], None] | None = None,
 ) -> dict:
-    """Extract structured, prioritized keywords from a job description."""
+    """Extract prioritized keywords, job title and company in one LLM call.
+
+    Returns the ``extract_jd_keywords`` dict plus a ``company`` key (empty
+    when the posting does not name one).  ``on_usage`` receives the call
+    record (tokens, latency, estimated cost).  The reply is constrained to
+    ``JD_ANALYSIS_SCHEMA``; broken fields are re-requested once and
+    otherwise left empty.
+    """
     client = get_client(api_key)
     prompt = f"""\
 Analyze the following job description and extract structured keyword data.
@@ -183,6 +782,7 @@ qualification mentioned.
 
 Return a JSON object with exactly these keys:
 - "job_title": the exact job title from the posting
+- "company": the name of the hiring company, or empty string if not stated
 - "required_hard_skills": array of mandatory technical skills, tools,
   technologies, programming languages, and frameworks explicitly required
 - "required_soft_skills": array of soft skills mentioned as required
@@ -203,22 +803,53 @@ Return a JSON object with exactly these keys:
 JOB DESCRIPTION:
 \"\"\"{jd_text}\"\"\"
 """
-    resp = client.chat.completions.create(
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "You extract structured data from job descriptions "
+                "with high precision. Include every relevant keyword."
+            ),
+        },
+        {"role": "user", "content": prompt},
+    ]
+    started = time.perf_counter()
+    resp = _create(
+        client,
         model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You extract structured data from job descriptions "
-                    "with high precision. Include every relevant keyword."
-                ),
-            },
-            {"role": "user", "content": prompt},
-        ],
+        messages=messages,
         temperature=0,
+        response_format=_response_format("jd_analysis", JD_ANALYSIS_SCHEMA),
+    )
+    record = {"call": "jd_analysis", "model": model, **_usage(resp)}
+    message = resp.choices[0].message
+    if getattr(message, "refusal", None):
+        raise RuntimeError(f"Model refused the request: {message.refusal}")
+    data, _ = _finish_structured(
+        client,
+        model,
+        messages,
+        message.content,
+        "jd_analysis",
+        JD_ANALYSIS_SCHEMA,
+        record,
     )
-    data = _parse_json_from_content(resp.choices[0].message.content)
-    return data if isinstance(data, dict) else {}
+    record["latency_s"] = round(time.perf_counter() - started, 3)
+    _record_call(record, on_usage)
+    return data
+
+
+def extract_jd_keywords(
+    jd_text: str,
+    model: str = JD_ANALYSIS_MODEL,
+    api_key: str | None = None,
+) -> dict:
+    """Extract structured, prioritized keywords from a job description.
+
+    Wrapper around ``analyze_job_description``; prefer that when the title
+    and company are needed too.
+    """
+    return analyze_job_description(jd_text, model=model, api_key=api_key)
 
 
 # ---------------------------------------------------------------------------
@@ -386,17 +1017,9 @@ Choose from: "Job Title Mirroring", "Keyword Frequency Optimization", \
 "Quantified Achievements", "Date Format Consistency"."""
 
 
-def build_user_prompt(
-    resume_text: str,
-    jd_text: str,
-    jd_keywords: dict | None = None,
-    primary_color: str = "#2563eb",
-) -> str:
-    keyword_checklist = _format_keyword_checklist(jd_keywords or {})
-
-    return f"""\
-I will give you my current resume and a target job description.
-{keyword_checklist}
+# Static head of ``build_user_prompt``; nothing per-call may go in here.
+_USER_PROMPT_INSTRUCTIONS = f"""\
+I will give you my current resume and a target job description below.
 
 **Your task:**
 1. Analyze the job description and categorize requirements into:
@@ -424,9 +1047,6 @@ I will give you my current resume and a target job description.
 **HTML output format:**
 {CONTENT_STRUCTURE}
 
-The selected accent color is {primary_color} — you do NOT need to add any
-inline color styles; the template CSS handles colors automatically.
-
 {_ATS_SCORING_RUBRIC}
 
 **Return a single JSON object with exactly these keys:**
@@ -439,21 +1059,55 @@ inline color styles; the template CSS handles colors automatically.
   in this iteration.
   {_STRATEGIES_LIST}
 - "changes_summary": a brief 2-3 sentence summary of the key changes and
-  optimizations you made compared to the original resume.
+  optimizations you made compared to the original resume."""
 
-JOB DESCRIPTION:
-\"\"\"{jd_text}\"\"\"
+
+def build_user_prompt(
+    resume_text: str,
+    jd_text: str,
+    jd_keywords: dict | None = None,
+    primary_color: str = "#2563eb",
+) -> str:
+    """First optimization prompt: static instructions, then resume, then JD.
+
+    Everything before ``CURRENT RESUME`` is identical for every call, and
+    everything before ``JOB DESCRIPTION`` for every call with the same
+    resume, so (after ``SYSTEM_PROMPT``) it forms a prefix the provider's
+    prompt cache can serve.  Per-job material comes last.
+    """
+    keyword_checklist = _format_keyword_checklist(jd_keywords or {})
+
+    return f"""\
+{_USER_PROMPT_INSTRUCTIONS}
 
 CURRENT RESUME:
 \"\"\"{resume_text}\"\"\"
+
+JOB DESCRIPTION:
+\"\"\"{jd_text}\"\"\"
+{keyword_checklist}
+
+The selected accent color is {primary_color} — you do NOT need to add any
+inline color styles; the template CSS handles colors automatically.
 """
 
 
-def _build_refinement_prompt(
+_PLACEMENT_GUIDANCE = """\
+**Placement guidance:**
+- Must-have keywords -> add to Professional Summary + Skills section + at
+  least one Experience bullet each.
+- Preferred keywords -> add to Skills section and/or relevant Experience
+  bullets.
+- Verify each primary keyword appears in at least 2-3 sections.
+- Verify all keywords are in meaningful, achievement-based contexts."""
+
+
+def _refinement_priorities(
     missing_keywords: list[str],
     verification: dict | None = None,
     resolved_keywords: list[str] | None = None,
 ) -> str:
+    """Missing, prioritized and already-resolved keywords of a refinement."""
     priority_section = ""
     if verification:
         must_have_missing = verification.get("missing_must_have", [])
@@ -492,18 +1146,15 @@ def _build_refinement_prompt(
     return f"""\
 The following important keywords are still weak or missing in the resume:
 {json.dumps(missing_keywords)}
-{priority_section}{preserve_section}
+{priority_section}{preserve_section}"""
+
+
+_REFINEMENT_INSTRUCTIONS = f"""\
 Revise the resume HTML to incorporate the missing keywords naturally —
 without exaggeration or keyword stuffing. Keep the same HTML structure
 and class names.
 
-**Placement guidance:**
-- Must-have keywords -> add to Professional Summary + Skills section + at
-  least one Experience bullet each.
-- Preferred keywords -> add to Skills section and/or relevant Experience
-  bullets.
-- Verify each primary keyword appears in at least 2-3 sections.
-- Verify all keywords are in meaningful, achievement-based contexts.
+{_PLACEMENT_GUIDANCE}
 
 {_ATS_SCORING_RUBRIC}
 
@@ -517,6 +1168,101 @@ Return the updated JSON object in the same format:
   this revision to incorporate the missing keywords and improve the score.
 """
 
+_SECTION_REFINEMENT_INSTRUCTIONS = f"""\
+Every editable block of the draft carries a data-block id.  Revise only
+the blocks that need to change to incorporate the missing keywords
+naturally — without exaggeration or keyword stuffing. Every other block
+is kept exactly as it is.
+
+{_PLACEMENT_GUIDANCE}
+
+{_ATS_SCORING_RUBRIC}
+
+Return a JSON object with:
+- "edits": an array with one {{"block", "html"}} object per changed block.
+  "block" is its data-block id; "html" is the complete new HTML of that
+  block with the same element and class names, without data-block
+  attributes.  Prefer the smallest block that needs the change (one
+  experience item rather than the whole experience section).
+- "ats_score" (for the whole resume after your edits, based on rubric)
+- "missing_keywords" (flat array of what's still missing after this revision)
+- "strategies_applied" (array of strategy names applied in this revision)
+  {_STRATEGIES_LIST}
+- "changes_summary": a brief 2-3 sentence summary of what you changed in
+  this revision to incorporate the missing keywords and improve the score.
+"""
+
+_COMPACT_REFINEMENT_PREAMBLE = """\
+I am tailoring my resume to a job description. The instructions come
+first; the target requirements, the current best draft of my tailored
+resume as HTML and the keywords it still lacks follow them."""
+
+
+def _build_refinement_prompt(
+    missing_keywords: list[str],
+    verification: dict | None = None,
+    resolved_keywords: list[str] | None = None,
+) -> str:
+    return f"""\
+{_refinement_priorities(missing_keywords, verification, resolved_keywords)}
+{_REFINEMENT_INSTRUCTIONS}"""
+
+
+def _build_compact_refinement_prompt(
+    draft_html: str,
+    jd_text: str,
+    jd_keywords: dict | None,
+    missing_keywords: list[str],
+    verification: dict | None = None,
+    resolved_keywords: list[str] | None = None,
+    instructions: str = _REFINEMENT_INSTRUCTIONS,
+) -> str:
+    """Self-contained refinement prompt for the bounded-context loop.
+
+    Carries the keyword checklist (or, without one, the JD itself) and the
+    current best draft instead of the whole conversation, so every
+    refinement call is about the size of the first one.  The static
+    ``instructions`` lead, then the per-job requirements (the same in every
+    iteration), then the draft and its keyword delta, so the longest
+    possible prefix is shared between calls for the provider's prompt cache.
+    """
+    requirements = _format_keyword_checklist(jd_keywords or {})
+    if not requirements:
+        requirements = f'\nJOB DESCRIPTION:\n"""{jd_text}"""'
+    return f"""\
+{_COMPACT_REFINEMENT_PREAMBLE}
+
+{instructions}{requirements}
+
+CURRENT DRAFT:
+\"\"\"{draft_html}\"\"\"
+
+{_refinement_priorities(missing_keywords, verification, resolved_keywords)}"""
+
+
+def _build_section_refinement_prompt(
+    annotated_html: str,
+    jd_text: str,
+    jd_keywords: dict | None,
+    missing_keywords: list[str],
+    verification: dict | None = None,
+    resolved_keywords: list[str] | None = None,
+) -> str:
+    """Compact refinement prompt asking only for the blocks that change.
+
+    ``annotated_html`` is the best draft with ``data-block`` ids (see
+    ``_annotate_blocks``); the reply follows ``SECTION_EDIT_SCHEMA``.
+    """
+    return _build_compact_refinement_prompt(
+        annotated_html,
+        jd_text,
+        jd_keywords,
+        missing_keywords,
+        verification,
+        resolved_keywords,
+        instructions=_SECTION_REFINEMENT_INSTRUCTIONS,
+    )
+
 
 # ---------------------------------------------------------------------------
 # Single optimization call
@@ -526,20 +1272,451 @@ def optimize_resume_once(
     client: OpenAI,
     messages: list[dict],
     model: str = "gpt-4o-mini",
+    on_usage: Callable[[dict], None] | None = None,
+    on_partial: Callable[[dict], None] | None = None,
+    iteration: int | None = None,
+    temperature: float = 0.2,
 ) -> dict:
-    """Run one LLM call with the given message history. Returns parsed JSON."""
-    resp = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=0.2,
+    """Run one LLM call with the given message history. Returns parsed JSON.
+
+    ``on_usage`` receives the call record: ``call`` (``"optimize"``),
+    ``iteration`` (if given), ``model``, ``input_tokens``,
+    ``output_tokens``, ``cached_tokens``, ``cached_ratio``, ``latency_s``
+    (plus ``first_token_s`` when streaming) and ``cost_usd``.  With
+    ``on_partial`` the response is streamed and the callback receives
+    ``{"field", "delta"}`` for each new piece of a string value (e.g.
+    ``tailored_resume_html``) and ``{"field", "value"}`` once a field is
+    complete, so callers can show progress long before the reply ends.
+
+    The reply is constrained to ``OPTIMIZATION_SCHEMA``.  Fields that still
+    come back truncated or invalid are re-requested on their own (see
+    ``_finish_structured``); the record then includes the follow-up's
+    tokens and ``repaired_fields``.
+    """
+    record: dict = {"call": "optimize", "model": model}
+    if iteration is not None:
+        record["iteration"] = iteration
+    started = time.perf_counter()
+    data = _structured_call(
+        client,
+        messages,
+        model,
+        temperature,
+        "resume_optimization",
+        OPTIMIZATION_SCHEMA,
+        record,
+        on_partial,
+        required=("tailored_resume_html",),
     )
-    content = resp.choices[0].message.content
-    data = _parse_json_from_content(content)
-    if not isinstance(data, dict):
-        raise RuntimeError("Model did not return a JSON object.")
+    record["latency_s"] = round(time.perf_counter() - started, 3)
+    _record_call(record, on_usage)
+    return data
+
+
+def _structured_call(
+    client: OpenAI,
+    messages: list[dict],
+    model: str,
+    temperature: float,
+    schema_name: str,
+    schema: dict,
+    record: dict,
+    on_partial: Callable[[dict], None] | None,
+    required: tuple[str, ...] = (),
+) -> dict:
+    """Make a schema-constrained call, streaming it when ``on_partial`` is set.
+
+    Token counts (and ``first_token_s`` when streaming) go into ``record``;
+    the reply is validated and repaired by ``_finish_structured``.
+    """
+    response_format = _response_format(schema_name, schema)
+    started = time.perf_counter()
+    if on_partial is None:
+        resp = _create(
+            client,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            response_format=response_format,
+        )
+        record.update(_usage(resp))
+        content = resp.choices[0].message.content
+        refusal = getattr(resp.choices[0].message, "refusal", None)
+    else:
+        stream = _create(
+            client,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            response_format=response_format,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        parser: _StreamingJSONParser | None = _StreamingJSONParser()
+        parts: list[str] = []
+        refusal = ""
+        record.update(_usage(None))
+        for chunk in stream:
+            if chunk.usage:
+                record.update(_usage(chunk))
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            refusal += getattr(delta, "refusal", None) or ""
+            if not delta.content:
+                continue
+            text = delta.content
+            if not parts:
+                record["first_token_s"] = round(
+                    time.perf_counter() - started, 3
+                )
+            parts.append(text)
+            if parser is None:
+                continue
+            try:
+                events = parser.feed(text)
+            except json.JSONDecodeError:
+                parser = None  # malformed escape; repaired below
+                continue
+            for kind, field, payload in events:
+                on_partial({"field": field, kind: payload})
+        content = "".join(parts)
+    if refusal:
+        raise RuntimeError(f"Model refused the request: {refusal}")
+    data, repaired = _finish_structured(
+        client,
+        model,
+        messages,
+        content,
+        schema_name,
+        schema,
+        record,
+        required=required,
+    )
+    if on_partial is not None:
+        for field in repaired:
+            on_partial({"field": field, "value": data[field]})
     return data
 
 
+# ---------------------------------------------------------------------------
+# Section-level refinement
+# ---------------------------------------------------------------------------
+
+def _resume_blocks(soup: BeautifulSoup) -> dict[str, Tag]:
+    """Map block ids to the editable elements of content HTML, in order.
+
+    The ids are ``header``, each ``resume-section`` by its section class
+    (``summary``, ``skills``, ...) and each ``*-item`` of a section as
+    ``<section>-<n>`` (``experience-2``), following ``CONTENT_STRUCTURE``.
+    """
+    blocks: dict[str, Tag] = {}
+    header = soup.find(class_="resume-header")
+    if header is not None:
+        blocks["header"] = header
+    for n, section in enumerate(soup.find_all(class_="resume-section"), 1):
+        names = [c for c in section.get("class", []) if c != "resume-section"]
+        section_id = names[0] if names and names[0] not in blocks else f"section-{n}"
+        blocks[section_id] = section
+        items = section.find_all(
+            lambda tag: any(c.endswith("-item") for c in tag.get("class") or [])
+        )
+        for k, item in enumerate(items, 1):
+            blocks[f"{section_id}-{k}"] = item
+    return blocks
+
+
+def _annotate_blocks(draft_html: str) -> str | None:
+    """Return the draft with a ``data-block`` id on every editable block.
+
+    None when the draft has no recognizable blocks to edit.
+    """
+    soup = BeautifulSoup(draft_html, "html.parser")
+    blocks = _resume_blocks(soup)
+    if not blocks:
+        return None
+    for block_id, element in blocks.items():
+        element["data-block"] = block_id
+    return str(soup)
+
+
+def _splice_blocks(draft_html: str, edits: list[dict]) -> tuple[str, list[str]]:
+    """Replace the edited blocks of the draft; return the HTML and applied ids.
+
+    Unknown ids and empty replacements are ignored, as are edits of items
+    whose whole section is replaced too.
+    """
+    soup = BeautifulSoup(draft_html, "html.parser")
+    blocks = _resume_blocks(soup)
+    replacements = {
+        edit["block"]: edit["html"]
+        for edit in edits
+        if edit["block"] in blocks and edit["html"].strip()
+    }
+    applied = []
+    replaced: set[int] = set()
+    for block_id, element in blocks.items():
+        if block_id not in replacements:
+            continue
+        if any(id(parent) in replaced for parent in element.parents):
+            continue
+        fragment = BeautifulSoup(replacements[block_id], "html.parser")
+        for tag in fragment.find_all(attrs={"data-block": True}):
+            del tag["data-block"]
+        replaced.add(id(element))
+        element.replace_with(*list(fragment.contents))
+        applied.append(block_id)
+    return str(soup), applied
+
+
+def refine_resume_sections(
+    client: OpenAI,
+    messages: list[dict],
+    draft_html: str,
+    model: str = "gpt-4o-mini",
+    on_usage: Callable[[dict], None] | None = None,
+    on_partial: Callable[[dict], None] | None = None,
+    iteration: int | None = None,
+    temperature: float = 0.2,
+) -> dict:
+    """Ask for replacements of the changed blocks only and splice them in.
+
+    ``messages`` should end with ``_build_section_refinement_prompt`` for
+    ``draft_html``.  The reply follows ``SECTION_EDIT_SCHEMA``, so output
+    tokens scale with the size of the edit rather than the whole resume.
+    Returns the same keys as ``optimize_resume_once``, with
+    ``tailored_resume_html`` being the spliced draft, plus
+    ``edited_blocks`` (the ids that were replaced).  The call record's
+    ``call`` is ``"refine_sections"``; ``on_partial`` receives the streamed
+    fields and then the spliced ``tailored_resume_html`` as a ``value``.
+    """
+    record: dict = {"call": "refine_sections", "model": model}
+    if iteration is not None:
+        record["iteration"] = iteration
+    started = time.perf_counter()
+    data = _structured_call(
+        client,
+        messages,
+        model,
+        temperature,
+        "resume_sections",
+        SECTION_EDIT_SCHEMA,
+        record,
+        on_partial,
+    )
+    html, applied = _splice_blocks(draft_html, data.pop("edits"))
+    if on_partial is not None:
+        on_partial({"field": "tailored_resume_html", "value": html})
+    record["latency_s"] = round(time.perf_counter() - started, 3)
+    _record_call(record, on_usage)
+    return {"tailored_resume_html": html, **data, "edited_blocks": applied}
+
+
+# ---------------------------------------------------------------------------
+# Parallel candidates
+# ---------------------------------------------------------------------------
+
+# Sampling temperatures of candidates 1..K-1; candidate 0 is the regular
+# 0.2 call, so ``candidates=1`` behaves exactly like the serial loop.
+_CANDIDATE_TEMPERATURES = [0.6, 0.9, 0.4, 0.8, 1.0]
+_CANDIDATE_FOCUS_SIZE = 3
+
+
+def _candidate_variant(index: int) -> tuple[float, list[str]]:
+    """Temperature and ``ATS_STRATEGIES`` focus of parallel candidate ``index``."""
+    if index == 0:
+        return 0.2, []
+    temperature = _CANDIDATE_TEMPERATURES[
+        (index - 1) % len(_CANDIDATE_TEMPERATURES)
+    ]
+    start = (index - 1) * _CANDIDATE_FOCUS_SIZE
+    focus = [
+        ATS_STRATEGIES[(start + k) % len(ATS_STRATEGIES)]
+        for k in range(_CANDIDATE_FOCUS_SIZE)
+    ]
+    return temperature, focus
+
+
+def _candidate_score(result: dict, jd_keywords: dict | None) -> tuple:
+    """Sort key of a draft: verified coverage, then must-haves, then self-score."""
+    ats_score = int(result.get("ats_score", 0))
+    if not jd_keywords or not result.get("tailored_resume_html"):
+        return ats_score, 0, ats_score
+    verification = verify_keyword_coverage(
+        result["tailored_resume_html"], jd_keywords
+    )
+    return (
+        verification["programmatic_score"],
+        verification["must_have_score"],
+        ats_score,
+    )
+
+
+def _best_candidate(
+    client: OpenAI,
+    messages: list[dict],
+    count: int,
+    jd_keywords: dict | None,
+    model: str,
+    iteration: int,
+    on_partial: Callable[[dict], None] | None,
+    draft_html: str | None = None,
+) -> tuple[dict, dict, list[dict], list[dict]]:
+    """Generate ``count`` drafts concurrently and return the best one.
+
+    Candidate 0 runs on the calling thread (so only it streams to
+    ``on_partial``); the others use the temperatures and strategy focus of
+    ``_candidate_variant``.  With ``draft_html`` the candidates are section
+    edits of that draft (``refine_resume_sections``).  Returns ``(result, record, records,
+    summaries)``: the winning draft and its call record, every call record,
+    and one summary per draft.  A failed candidate is skipped unless all of
+    them fail.
+    """
+
+    def _generate(index: int, stream) -> tuple[dict, dict]:
+        temperature, focus = _candidate_variant(index)
+        variant = messages
+        if focus:
+            variant = messages[:-1] + [
+                {
+                    **messages[-1],
+                    "content": messages[-1]["content"]
+                    + "\n\nIn this draft, lean especially on these "
+                    f"strategies: {', '.join(focus)}.",
+                }
+            ]
+        record: dict = {}
+        options = {
+            "model": model,
+            "on_usage": record.update,
+            "on_partial": stream,
+            "iteration": iteration,
+            "temperature": temperature,
+        }
+        if draft_html is not None:
+            result = refine_resume_sections(client, variant, draft_html, **options)
+        else:
+            result = optimize_resume_once(client, variant, **options)
+        return result, record
+
+    outcomes: list[tuple[dict, dict] | BaseException] = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=count - 1) as pool:
+        futures = [pool.submit(_generate, n, None) for n in range(1, count)]
+        try:
+            outcomes.append(_generate(0, on_partial))
+        except Exception as e:  # noqa: BLE001
+            outcomes.append(e)
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:  # noqa: BLE001
+                outcomes.append(e)
+
+    drafts = [
+        (n, *outcome)
+        for n, outcome in enumerate(outcomes)
+        if not isinstance(outcome, BaseException)
+    ]
+    if not drafts:
+        raise outcomes[0]
+    scores = {n: _candidate_score(result, jd_keywords) for n, result, _ in drafts}
+    winner = max(drafts, key=lambda draft: (scores[draft[0]], -draft[0]))
+    summaries = []
+    for n, outcome in enumerate(outcomes):
+        temperature, focus = _candidate_variant(n)
+        summary = {"candidate": n, "temperature": temperature, "focus": focus}
+        if isinstance(outcome, BaseException):
+            summary["error"] = str(outcome)
+        else:
+            summary["ats_score"] = int(outcome[0].get("ats_score", 0))
+            summary["verified_score"] = scores[n][0]
+            summary["selected"] = n == winner[0]
+        summaries.append(summary)
+    records = [record for _, _, record in drafts]
+    return winner[1], winner[2], records, summaries
+
+
+# ---------------------------------------------------------------------------
+# Stopping policy
+# ---------------------------------------------------------------------------
+
+STOP_REASONS = {
+    "target": "target score reached",
+    "must_haves": "all must-have keywords found",
+    "plateau": "verified score stopped improving",
+    "time_budget": "time budget exhausted",
+    "token_budget": "token budget exhausted",
+    "max_iterations": "maximum iterations reached",
+}
+
+
+class StoppingPolicy:
+    """Decides after each iteration whether ``optimize_until_target`` stops.
+
+    Scores are the verified (programmatic) keyword score when JD keywords
+    are available, and the model's self-reported ``ats_score`` otherwise, so
+    an over-reporting model neither ends the loop early nor keeps it going.
+    In order, the loop stops when:
+
+    * ``target``: the score reaches ``target_score``;
+    * ``must_haves``: every must-have keyword is present
+      (``stop_on_must_haves``);
+    * ``plateau``: the best score has not improved by ``min_gain`` points
+      for ``patience`` iterations;
+    * ``time_budget`` / ``token_budget``: another iteration as expensive as
+      the last one would exceed ``max_seconds`` / ``max_tokens``.
+
+    Any callable with the same signature can be passed instead.
+    """
+
+    def __init__(
+        self,
+        patience: int = 2,
+        min_gain: int = 1,
+        stop_on_must_haves: bool = True,
+        max_seconds: float | None = None,
+        max_tokens: int | None = None,
+    ) -> None:
+        self.patience = patience
+        self.min_gain = min_gain
+        self.stop_on_must_haves = stop_on_must_haves
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+
+    def __call__(self, history: list[dict], target_score: int) -> str | None:
+        """Return a ``STOP_REASONS`` key, or None to run another iteration.
+
+        ``history`` holds one entry per iteration so far: ``score``,
+        ``ats_score``, ``must_have_found``, ``must_have_total``, ``tokens``,
+        ``total_tokens``, ``duration_s`` and ``elapsed_s``.
+        """
+        last = history[-1]
+        if last["score"] >= target_score:
+            return "target"
+        if (
+            self.stop_on_must_haves
+            and last["must_have_total"]
+            and last["must_have_found"] == last["must_have_total"]
+        ):
+            return "must_haves"
+        if self.patience and len(history) > self.patience:
+            before = max(h["score"] for h in history[: -self.patience])
+            recent = max(h["score"] for h in history[-self.patience:])
+            if recent < before + self.min_gain:
+                return "plateau"
+        if (
+            self.max_seconds is not None
+            and last["elapsed_s"] + last["duration_s"] > self.max_seconds
+        ):
+            return "time_budget"
+        if (
+            self.max_tokens is not None
+            and last["total_tokens"] + last["tokens"] > self.max_tokens
+        ):
+            return "token_budget"
+        return None
+
+
 # ---------------------------------------------------------------------------
 # Iterative optimization loop
 # ---------------------------------------------------------------------------
@@ -554,8 +1731,14 @@ def optimize_until_target(
     model: str = "gpt-4o-mini",
     api_key: str | None = None,
     on_iteration: Callable[[dict], None] | None = None,
+    compact_context: bool = False,
+    on_usage: Callable[[dict], None] | None = None,
+    on_partial: Callable[[dict], None] | None = None,
+    candidates: int = 1,
+    stopping: Callable[[list[dict], int], str | None] | None = None,
+    section_edits: bool = False,
 ) -> dict:
-    """Iteratively optimize resume until target ATS score or max iterations.
+    """Iteratively optimize resume until the stopping policy ends the loop.
 
     Parameters
     ----------
@@ -567,9 +1750,54 @@ def optimize_until_target(
         Called after each iteration with a dict containing:
         ``iteration``, ``ats_score``, ``verified_score``,
         ``missing_keywords``, ``improvements``, ``strategies``,
-        ``verification``, ``changes_summary``.
+        ``verification``, ``changes_summary``, ``input_tokens``,
+        ``output_tokens``, ``cached_tokens``, ``usage`` (the full call
+        record).
+    compact_context : bool
+        Refine from a fresh two-message context (system prompt plus the
+        keyword checklist, the best draft so far and its verification
+        delta) instead of appending every draft to the conversation, so
+        input size stays constant per iteration.  ``False`` (the default)
+        keeps the full history, which grows with every iteration; the CLI
+        and app opt in.
+    on_usage : callable, optional
+        Called after each LLM call with its record (see
+        ``optimize_resume_once``).
+    on_partial : callable, optional
+        Streams each iteration's reply; called with the events of
+        ``optimize_resume_once`` plus ``iteration``.
+    candidates : int
+        Drafts generated concurrently per iteration.  Above 1, the extra
+        drafts vary the temperature and ask for a different subset of
+        ``ATS_STRATEGIES``; each is scored with ``verify_keyword_coverage``
+        and only the best is carried forward.  Fewer rounds are needed to
+        reach the target at the cost of ``candidates`` times the tokens.
+        ``on_iteration`` then also receives ``candidates`` (per-draft
+        temperature, focus and scores) and ``input_tokens`` /
+        ``output_tokens`` cover the whole round; only the first draft is
+        streamed to ``on_partial``.
+    stopping : callable, optional
+        Stopping policy called after every iteration (default:
+        ``StoppingPolicy()``): stop at the target verified score, once all
+        must-haves are found, on a plateau, or before a time / token budget
+        runs out.  The final ``on_iteration`` payload carries its
+        ``stop_reason`` (a ``STOP_REASONS`` key, or ``"max_iterations"``);
+        earlier ones carry None.
+    section_edits : bool
+        With ``compact_context``, refinements return replacements for the
+        changed ``data-block`` sections only (``refine_resume_sections``)
+        and are spliced into the best draft locally, so output tokens shrink
+        to the size of the edit.  ``on_iteration`` then also receives
+        ``edited_blocks``.  Drafts without recognizable blocks, and
+        ``False`` (the default; the CLI and app opt in), regenerate the
+        whole resume every iteration.
     """
     client = get_client(api_key)
+    if stopping is None:
+        stopping = StoppingPolicy()
+    started = time.perf_counter()
+    history: list[dict] = []
+    total_tokens = 0
 
     messages: list[dict] = [
         {"role": "system", "content": SYSTEM_PROMPT},
@@ -583,11 +1811,57 @@ def optimize_until_target(
 
     best_result: dict | None = None
     best_verified_score: int = 0
+    best_missing: list[str] = []
+    best_verification: dict | None = None
+    refine_draft: str | None = None
     all_seen_keywords: dict[str, bool] = {}
     all_strategies: dict[str, bool] = {}
 
     for i in range(max_iterations):
-        result = optimize_resume_once(client, messages, model=model)
+        iteration_started = time.perf_counter()
+        stream = (
+            (lambda event, n=i + 1: on_partial({"iteration": n, **event}))
+            if on_partial
+            else None
+        )
+        candidate_summaries = None
+        if candidates > 1:
+            result, usage, records, candidate_summaries = _best_candidate(
+                client,
+                messages,
+                candidates,
+                jd_keywords,
+                model=model,
+                iteration=i + 1,
+                on_partial=stream,
+                draft_html=refine_draft,
+            )
+        elif refine_draft is not None:
+            usage = {}
+            result = refine_resume_sections(
+                client,
+                messages,
+                refine_draft,
+                model=model,
+                on_usage=usage.update,
+                on_partial=stream,
+                iteration=i + 1,
+            )
+            records = [usage]
+        else:
+            usage = {}
+            result = optimize_resume_once(
+                client,
+                messages,
+                model=model,
+                on_usage=usage.update,
+                on_partial=stream,
+                iteration=i + 1,
+            )
+            records = [usage]
+        if on_usage:
+            for record in records:
+                on_usage(dict(record))
         ats_score = int(result.get("ats_score", 0))
 
         # --- keyword tracking (flat list, backward-compatible) ---
@@ -639,29 +1913,85 @@ def optimize_until_target(
 
         changes_summary = result.get("changes_summary", "")
 
-        if on_iteration:
-            on_iteration(
-                {
-                    "iteration": i + 1,
-                    "ats_score": ats_score,
-                    "verified_score": verified_score,
-                    "missing_keywords": missing,
-                    "improvements": improvements,
-                    "strategies": strategy_list,
-                    "verification": verification,
-                    "changes_summary": changes_summary,
-                }
-            )
-
         effective_score = verified_score if verification else ats_score
         if best_result is None or effective_score > best_verified_score:
             best_result = result
             best_verified_score = effective_score
+            best_missing = missing
+            best_verification = verification
+
+        tokens = sum(r["input_tokens"] + r["output_tokens"] for r in records)
+        total_tokens += tokens
+        now = time.perf_counter()
+        history.append(
+            {
+                "score": effective_score,
+                "ats_score": ats_score,
+                "must_have_found": (verification or {}).get("must_have_found", 0),
+                "must_have_total": (verification or {}).get("must_have_total", 0),
+                "tokens": tokens,
+                "total_tokens": total_tokens,
+                "duration_s": now - iteration_started,
+                "elapsed_s": now - started,
+            }
+        )
+        stop_reason = stopping(history, target_score)
+        if stop_reason is None and i == max_iterations - 1:
+            stop_reason = "max_iterations"
 
-        if ats_score >= target_score:
+        if on_iteration:
+            data = {
+                "iteration": i + 1,
+                "ats_score": ats_score,
+                "verified_score": verified_score,
+                "missing_keywords": missing,
+                "improvements": improvements,
+                "strategies": strategy_list,
+                "verification": verification,
+                "changes_summary": changes_summary,
+                "input_tokens": sum(r["input_tokens"] for r in records),
+                "output_tokens": sum(r["output_tokens"] for r in records),
+                "cached_tokens": sum(r["cached_tokens"] for r in records),
+                "usage": usage,
+                "stop_reason": stop_reason,
+            }
+            if candidate_summaries is not None:
+                data["candidates"] = candidate_summaries
+            if "edited_blocks" in result:
+                data["edited_blocks"] = result["edited_blocks"]
+            on_iteration(data)
+
+        if stop_reason is not None:
             break
 
         resolved_kws = [kw for kw, r in all_seen_keywords.items() if r]
+        if compact_context:
+            draft_html = best_result.get("tailored_resume_html", "")
+            annotated = _annotate_blocks(draft_html) if section_edits else None
+            refine_draft = draft_html if annotated is not None else None
+            if annotated is not None:
+                prompt = _build_section_refinement_prompt(
+                    annotated,
+                    jd_text,
+                    jd_keywords,
+                    best_missing,
+                    verification=best_verification,
+                    resolved_keywords=resolved_kws,
+                )
+            else:
+                prompt = _build_compact_refinement_prompt(
+                    draft_html,
+                    jd_text,
+                    jd_keywords,
+                    best_missing,
+                    verification=best_verification,
+                    resolved_keywords=resolved_kws,
+                )
+            messages = [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ]
+            continue
         assistant_content = json.dumps(result, ensure_ascii=False)
         messages.append({"role": "assistant", "content": assistant_content})
         messages.append(
@@ -684,35 +2014,15 @@ def optimize_until_target(
 
 def extract_title_and_company(
     jd_text: str,
-    model: str = "gpt-4o-mini",
+    model: str = JD_ANALYSIS_MODEL,
     api_key: str | None = None,
 ) -> tuple[str, str]:
-    """Extract job title and company name from job description using LLM."""
-    client = get_client(api_key)
-    prompt = f"""\
-From the following job description, extract:
-1. The job title.
-2. The company name.
-
-Return a JSON object: {{"job_title": "...", "company": "..."}}.
+    """Extract job title and company name from job description using LLM.
 
-JOB DESCRIPTION:
-\"\"\"{jd_text}\"\"\"
-"""
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": "You extract structured fields from job descriptions.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0,
-    )
-    data = _parse_json_from_content(resp.choices[0].message.content)
-    if not isinstance(data, dict):
-        data = {}
-    job_title = data.get("job_title", "UnknownRole")
-    company = data.get("company", "UnknownCompany")
+    Wrapper around ``analyze_job_description``; prefer that when the
+    keywords are needed too.
+    """
+    data = analyze_job_description(jd_text, model=model, api_key=api_key)
+    job_title = data.get("job_title") or "UnknownRole"
+    company = data.get("company") or "UnknownCompany"
     return job_title, company
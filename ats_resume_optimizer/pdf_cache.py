@@ -0,0 +1,128 @@
+"""Content-addressed on-disk cache of rendered resume PDFs.
+
+Entries are keyed by a SHA-256 of everything that determines the PDF bytes:
+the fully rendered template HTML, the print CSS injected by ``pdf_export``,
+the template version, and any render options (e.g. ``max_pages``,
+``optimize``, and the process-wide ``ATS_PDF_LINEARIZE`` setting).  A cache
+hit skips Chromium entirely.
+
+The cache lives in ``CACHE_DIR / "pdf"`` and is shared by all processes.
+When its total size exceeds ``ATS_PDF_CACHE_MAX_MB`` (default 200; ``0``
+disables caching) the least-recently-used entries are evicted.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from ats_resume_optimizer.config import CACHE_DIR
+from ats_resume_optimizer.pdf_export import _LINEARIZE, _PAGE_BREAK_CSS
+
+_PDF_CACHE_DIR = CACHE_DIR / "pdf"
+_MAX_BYTES = int(
+    float(os.environ.get("ATS_PDF_CACHE_MAX_MB", "200")) * 1024 * 1024
+)
+
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def pdf_cache_key(
+    full_html: str, template_version: int | str, **render_options
+) -> str:
+    """Return the cache key for a rendered template document."""
+    digest = hashlib.sha256()
+    options = json.dumps(
+        {**render_options, "linearize": _LINEARIZE}, sort_keys=True
+    )
+    for part in (full_html, _PAGE_BREAK_CSS, str(template_version), options):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_cached_pdf(key: str) -> bytes | None:
+    """Return the cached PDF for ``key`` (marking it recently used), or None."""
+    global _hits, _misses  # noqa: PLW0603
+    if _MAX_BYTES <= 0:
+        return None
+    path = _PDF_CACHE_DIR / f"{key}.pdf"
+    try:
+        data = path.read_bytes()
+    except OSError:
+        with _lock:
+            _misses += 1
+        return None
+    try:
+        os.utime(path)  # mtime doubles as the LRU timestamp
+    except OSError:
+        pass  # read-only or concurrently evicted: still a hit
+    with _lock:
+        _hits += 1
+    return data
+
+
+def store_pdf(key: str, data: bytes) -> None:
+    """Store a rendered PDF under ``key`` and evict LRU entries over budget."""
+    if _MAX_BYTES <= 0 or len(data) > _MAX_BYTES:
+        return
+    try:
+        _PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file.
+        fd, tmp = tempfile.mkstemp(dir=_PDF_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, _PDF_CACHE_DIR / f"{key}.pdf")
+    except OSError:
+        return  # the cache is best-effort; a failed write is just a miss later
+    _evict()
+
+
+def _evict() -> None:
+    entries = []
+    for path in _PDF_CACHE_DIR.glob("*.pdf"):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries, key=lambda e: e[0]):
+        if total <= _MAX_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+def cache_stats() -> dict:
+    """Return hit/miss counters (this process) and the cache's on-disk size."""
+    sizes = []
+    if _PDF_CACHE_DIR.exists():
+        for path in _PDF_CACHE_DIR.glob("*.pdf"):
+            try:
+                sizes.append(path.stat().st_size)
+            except OSError:
+                continue
+    with _lock:
+        hits, misses = _hits, _misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "entries": len(sizes),
+        "size_bytes": sum(sizes),
+        "max_bytes": _MAX_BYTES,
+    }
+
+
+def clear_cache() -> None:
+    """Delete every cached PDF and reset the hit/miss counters."""
+    global _hits, _misses  # noqa: PLW0603
+    if _PDF_CACHE_DIR.exists():
+        for path in _PDF_CACHE_DIR.glob("*.pdf"):
+            path.unlink(missing_ok=True)
+    with _lock:
+        _hits = 0
+        _misses = 0
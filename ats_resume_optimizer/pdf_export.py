@@ -4,30 +4,150 @@ Playwright uses a real browser engine so every CSS feature is supported:
 pseudo-elements, :not(), flexbox, grid, @page, page-break-*, etc.
 
 PDF generation runs in a subprocess to avoid event-loop conflicts with
-Streamlit's asyncio loop.
+Streamlit's asyncio loop.  By default a long-lived render service (the worker
+in ``--serve`` mode) keeps a warm Chromium between exports; if the service
+cannot be started or keeps dying, each export falls back to a one-shot worker
+process.  Set ``ATS_PDF_RENDER_SERVICE=0`` to always use the one-shot path.
+
+At most ``ATS_PDF_MAX_CONCURRENT`` renders (default: CPU count, capped at 4)
+run at once across all threads; each running render holds its own warm
+service from a pool, and further requests wait their turn instead of
+spawning more browsers.  ``*_async`` variants run renders on a dedicated
+thread pool of the same size so an asyncio event loop is never blocked.
+
+HTML goes to the worker over stdin and PDF bytes come back over stdout; the
+filesystem is only touched when a caller asks for a file (``html_to_pdf``).
+With ``optimize=True`` the worker also runs a pypdf post-processing pass
+(recompressed streams, merged duplicate objects, stripped toolchain
+metadata; linearized when ``ATS_PDF_LINEARIZE=1`` and pikepdf is installed).
+
+Each document gets ``ATS_PDF_RENDER_TIMEOUT`` seconds; a hung worker is
+killed together with its Chromium and the request retried once, and workers
+are recycled after ``ATS_PDF_RECYCLE_AFTER`` documents or once they exceed
+``ATS_PDF_RECYCLE_RSS_MB``.  Failures raise ``PdfRenderError``.
 """
 
+import asyncio
+import atexit
+import base64
+import collections
+import concurrent.futures
+import importlib.metadata
+import json
+import os
+import queue
+import signal
 import subprocess
 import sys
-import tempfile
+import threading
+import time
 from pathlib import Path
+from typing import Callable
+
+from ats_resume_optimizer.config import CACHE_DIR
 
 _WORKER = Path(__file__).parent / "_pdf_worker.py"
+_BROWSER_STAMP = CACHE_DIR / "chromium-ready.json"
 _chromium_ready = False
+_USE_RENDER_SERVICE = os.environ.get("ATS_PDF_RENDER_SERVICE", "1") != "0"
+_LINEARIZE = os.environ.get("ATS_PDF_LINEARIZE", "0") == "1"
+_RENDER_TIMEOUT = float(os.environ.get("ATS_PDF_RENDER_TIMEOUT", "60"))
+_STARTUP_TIMEOUT = 60.0
+_SERVICE_BACKOFF = float(os.environ.get("ATS_PDF_SERVICE_BACKOFF", "60"))
+_RECYCLE_AFTER = int(os.environ.get("ATS_PDF_RECYCLE_AFTER", "500"))
+_RECYCLE_RSS_MB = float(os.environ.get("ATS_PDF_RECYCLE_RSS_MB", "1500"))
+_MAX_CONCURRENT = int(os.environ.get("ATS_PDF_MAX_CONCURRENT", "0")) or min(
+    4, os.cpu_count() or 1
+)
 
 
-def _ensure_chromium() -> None:
-    """Install Playwright Chromium if the binary is not already present."""
-    global _chromium_ready  # noqa: PLW0603
-    if _chromium_ready:
-        return
-    # Attempt to install OS-level dependencies (needs root; silently ignored
-    # on hosts like Streamlit Cloud where packages.txt handles this instead).
-    subprocess.run(
-        [sys.executable, "-m", "playwright", "install-deps", "chromium"],
+def _playwright_version() -> str:
+    try:
+        return importlib.metadata.version("playwright")
+    except importlib.metadata.PackageNotFoundError:
+        return ""
+
+
+def _browser_locations() -> list[str]:
+    """Ask Playwright where its Chromium build lives (no download, ~1 s)."""
+    result = subprocess.run(
+        [sys.executable, "-m", "playwright", "install", "--dry-run", "chromium"],
         capture_output=True,
         text=True,
     )
+    if result.returncode != 0:
+        return []
+    return [
+        line.split(":", 1)[1].strip()
+        for line in result.stdout.splitlines()
+        if line.strip().startswith("Install location:")
+    ]
+
+
+def _locations_installed(locations: list[str]) -> bool:
+    # Playwright drops this marker into a browser directory once it is
+    # completely downloaded and extracted.
+    return bool(locations) and all(
+        (Path(loc) / "INSTALLATION_COMPLETE").exists() for loc in locations
+    )
+
+
+def _read_stamp() -> dict:
+    try:
+        return json.loads(_BROWSER_STAMP.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_stamp(locations: list[str]) -> None:
+    stamp = {
+        "playwright": _playwright_version(),
+        "browsers_path": os.environ.get("PLAYWRIGHT_BROWSERS_PATH", ""),
+        "locations": locations,
+    }
+    try:
+        _BROWSER_STAMP.write_text(json.dumps(stamp), encoding="utf-8")
+    except OSError:
+        pass  # read-only cache dir: the probe simply runs again next time
+
+
+def chromium_is_ready() -> bool:
+    """Return True if Playwright's Chromium is installed, without installing it.
+
+    The answer is cached on disk in a sentinel stamped with the Playwright
+    version and browsers path, so it is shared by every process (CLI runs,
+    Streamlit workers) and only re-probed after a Playwright upgrade.
+    """
+    stamp = _read_stamp()
+    if (
+        stamp.get("playwright") == _playwright_version()
+        and stamp.get("browsers_path")
+        == os.environ.get("PLAYWRIGHT_BROWSERS_PATH", "")
+        and _locations_installed(stamp.get("locations", []))
+    ):
+        return True
+    locations = _browser_locations()
+    if _locations_installed(locations):
+        _write_stamp(locations)
+        return True
+    return False
+
+
+def install_browser(with_deps: bool = True) -> None:
+    """Install Playwright Chromium (and optionally its OS packages) and stamp it.
+
+    This is the explicit provisioning step behind
+    ``python -m ats_resume_optimizer install-browser``.
+    """
+    if with_deps:
+        # Attempt to install OS-level dependencies (needs root; silently
+        # ignored on hosts like Streamlit Cloud where packages.txt handles
+        # this instead).
+        subprocess.run(
+            [sys.executable, "-m", "playwright", "install-deps", "chromium"],
+            capture_output=True,
+            text=True,
+        )
     result = subprocess.run(
         [sys.executable, "-m", "playwright", "install", "chromium"],
         capture_output=True,
@@ -38,6 +158,16 @@ def _ensure_chromium() -> None:
             f"Playwright browser install failed (exit {result.returncode}):\n"
             f"{result.stderr}"
         )
+    _write_stamp(_browser_locations())
+
+
+def _ensure_chromium() -> None:
+    """Install Playwright Chromium if the binary is not already present."""
+    global _chromium_ready  # noqa: PLW0603
+    if _chromium_ready:
+        return
+    if not chromium_is_ready():
+        install_browser()
     _chromium_ready = True
 
 # Page-break CSS injected into every resume for print safety
@@ -84,31 +214,650 @@ def _inject_page_break_css(html: str) -> str:
     return f"<html><head>{_PAGE_BREAK_CSS}</head><body>{html}</body></html>"
 
 
-def html_to_pdf(html: str, output_path: Path) -> None:
-    """Render HTML to PDF via headless Chromium in a subprocess.
+# ---------------------------------------------------------------------------
+# Warm render service
+# ---------------------------------------------------------------------------
 
-    A subprocess is used so Playwright gets its own event loop, avoiding
-    conflicts with Streamlit's asyncio loop on Windows.
+class PdfRenderError(RuntimeError):
+    """A PDF (or thumbnail) render failed.
+
+    Carries enough context to reproduce the failure: the failing job's
+    index and HTML size, whether it timed out, and — when raised through
+    ``agent`` — the template id.
     """
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    _ensure_chromium()
-    enhanced_html = _inject_page_break_css(html)
 
-    tmp = tempfile.NamedTemporaryFile(
-        mode="w", suffix=".html", delete=False, encoding="utf-8"
-    )
+    def __init__(
+        self,
+        message: str,
+        *,
+        job_index: int | None = None,
+        html_size: int | None = None,
+        template_id: str | None = None,
+        timed_out: bool = False,
+    ) -> None:
+        super().__init__(message)
+        self.job_index = job_index
+        self.html_size = html_size
+        self.template_id = template_id
+        self.timed_out = timed_out
+
+    def __str__(self) -> str:
+        context = [
+            f"{label}={value}"
+            for label, value in (
+                ("template", self.template_id),
+                ("job", self.job_index),
+                ("html_bytes", self.html_size),
+            )
+            if value is not None
+        ]
+        message = super().__str__()
+        return f"{message} [{', '.join(context)}]" if context else message
+
+    def to_dict(self) -> dict:
+        """Return the error as a structured report (e.g. for logging)."""
+        return {
+            "error": super().__str__(),
+            "template_id": self.template_id,
+            "job_index": self.job_index,
+            "html_size": self.html_size,
+            "timed_out": self.timed_out,
+        }
+
+
+class _ServiceUnavailable(Exception):
+    """The render service could not be started or died mid-request."""
+
+
+class _RenderTimeout(Exception):
+    """The worker did not answer before the request deadline."""
+
+
+_counters: collections.Counter[str] = collections.Counter()
+
+
+def _request_deadline(jobs: int) -> float:
+    # The worker enforces the per-document timeout itself and retries a hung
+    # batch once on a fresh browser; this parent-side deadline is only the
+    # backstop for a wedged worker process.
+    return _STARTUP_TIMEOUT + 2 * _RENDER_TIMEOUT * max(1, jobs)
+
+
+def _kill(proc: subprocess.Popen) -> None:
+    """Kill a worker together with its Chromium processes."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass
     try:
-        tmp.write(enhanced_html)
-        tmp.close()
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        pass
 
-        result = subprocess.run(
-            [sys.executable, str(_WORKER), tmp.name, str(output_path)],
-            capture_output=True,
+
+def _group_rss_mb(pgid: int) -> float:
+    """Resident memory of a process group (worker + Chromium) in MB.
+
+    Reads ``/proc``; returns 0 where it is unavailable (macOS, Windows).
+    """
+    total_pages = 0
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return 0.0
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                fields = f.read().rsplit(b")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[2]) == pgid:
+            total_pages += int(fields[21])
+    return total_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _encode_request(
+    htmls: list[str],
+    wait_for_network: bool = False,
+    max_pages: int | None = None,
+    screenshot_scale: float | None = None,
+    optimize: bool = False,
+) -> str:
+    request: dict = {
+        "jobs": [
+            {
+                "html": html,
+                "wait_for_network": wait_for_network,
+                "max_pages": max_pages,
+                "optimize": optimize,
+                "linearize": optimize and _LINEARIZE,
+                "timeout": _RENDER_TIMEOUT,
+            }
+            for html in htmls
+        ]
+    }
+    if screenshot_scale:
+        request["screenshot_scale"] = screenshot_scale
+    return json.dumps(request)
+
+
+def _decode_response(
+    response: dict, htmls: list[str]
+) -> tuple[list[bytes], list[dict]]:
+    if not response.get("ok"):
+        errors = response.get("errors") or [{}]
+        index = errors[0].get("index")
+        if any(error.get("timed_out") for error in errors):
+            _counters["timeouts"] += 1
+        raise PdfRenderError(
+            f"PDF generation failed:\n{response.get('error', '')}",
+            job_index=index,
+            html_size=len(htmls[index].encode("utf-8"))
+            if index is not None
+            else None,
+            timed_out=bool(errors[0].get("timed_out")),
+        )
+    results = [base64.b64decode(data) for data in response["results"]]
+    return results, response.get("reports") or [{} for _ in results]
+
+
+class _RenderService:
+    """Supervised ``_pdf_worker.py --serve`` process holding a launched browser.
+
+    Requests are serialized with a lock, so the service is safe to share
+    between Streamlit script threads.  A worker that exits (browser launch
+    failure, crash, killed by the OS) is restarted on the next request; one
+    that does not answer before the deadline is killed with its Chromium
+    and the request retried once on a fresh worker.  After
+    ``ATS_PDF_RECYCLE_AFTER`` documents, or once the worker's process group
+    exceeds ``ATS_PDF_RECYCLE_RSS_MB``, the worker is retired so memory
+    growth stays bounded.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._proc: subprocess.Popen | None = None
+        self._stdout: queue.Queue[str | None] = queue.Queue()
+        self._stderr: collections.deque[str] = collections.deque(maxlen=50)
+        self._rendered = 0
+
+    def _drain(self, proc: subprocess.Popen, out: queue.Queue) -> None:
+        for line in proc.stdout:
+            out.put(line)
+        out.put(None)
+
+    def _drain_stderr(self, proc: subprocess.Popen) -> None:
+        for line in proc.stderr:
+            self._stderr.append(line)
+
+    def _start(self) -> None:
+        proc = subprocess.Popen(
+            [sys.executable, str(_WORKER), "--serve"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
+            encoding="utf-8",
+            # Own process group, so a hung worker can be killed together
+            # with the Chromium it launched.
+            start_new_session=True,
+        )
+        # Each process gets its own queue so a late line from a killed
+        # worker can never be mistaken for a reply from its successor.
+        self._stdout = queue.Queue()
+        threading.Thread(
+            target=self._drain, args=(proc, self._stdout), daemon=True
+        ).start()
+        threading.Thread(
+            target=self._drain_stderr, args=(proc,), daemon=True
+        ).start()
+        self._proc = proc
+        self._rendered = 0
+        try:
+            status = self._read(_STARTUP_TIMEOUT)
+        except _RenderTimeout:
+            self._kill()
+            raise _ServiceUnavailable("worker did not start") from None
+        if not status.get("ready"):
+            self.stop()
+            raise _ServiceUnavailable(status.get("error", "worker not ready"))
+
+    def _read(self, timeout: float) -> dict:
+        try:
+            line = self._stdout.get(timeout=timeout)
+        except queue.Empty:
+            raise _RenderTimeout from None
+        if line is None:
+            raise _ServiceUnavailable(
+                "render service exited:\n" + "".join(self._stderr)
+            )
+        return json.loads(line)
+
+    def _kill(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is not None:
+            _kill(proc)
+
+    @staticmethod
+    def _retire(proc: subprocess.Popen) -> None:
+        """Let a detached worker exit on EOF, killing it if it does not."""
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            _kill(proc)
+
+    def stop(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is not None:
+            self._retire(proc)
+
+    def _maybe_recycle(self, jobs: int) -> None:
+        self._rendered += jobs
+        proc = self._proc
+        over_count = _RECYCLE_AFTER and self._rendered >= _RECYCLE_AFTER
+        over_memory = (
+            _RECYCLE_RSS_MB and _group_rss_mb(proc.pid) > _RECYCLE_RSS_MB
+        )
+        if over_count or over_memory:
+            _counters["recycles"] += 1
+            # Detach under the caller's lock so the next request starts a
+            # new worker, and retire the old one in the background.
+            self._proc = None
+            self._rendered = 0
+            threading.Thread(target=self._retire, args=(proc,), daemon=True).start()
+
+    def render(self, request: str, jobs: int) -> dict:
+        """Send one encoded request and return the worker's response.
+
+        A dead worker is restarted and a hung one killed, each retried once.
+        """
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._proc is None or self._proc.poll() is not None:
+                        self._start()
+                    self._proc.stdin.write(request + "\n")
+                    self._proc.stdin.flush()
+                    response = self._read(_request_deadline(jobs))
+                except _RenderTimeout:
+                    _counters["timeouts"] += 1
+                    self._kill()
+                    if attempt == 1:
+                        raise
+                    continue
+                except (OSError, _ServiceUnavailable):
+                    self.stop()
+                    if attempt == 1:
+                        raise _ServiceUnavailable(
+                            "render service unavailable"
+                        ) from None
+                    _counters["restarts"] += 1
+                    continue
+                self._maybe_recycle(jobs)
+                return response
+
+
+class _RenderGate:
+    """Resizable counting semaphore with queue-depth counters.
+
+    ``threading.BoundedSemaphore`` cannot be resized at runtime, and we also
+    want to know how many renders are running and how many are queued.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self._cond = threading.Condition()
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+
+    def __enter__(self) -> None:
+        with self._cond:
+            self.waiting += 1
+            try:
+                while self.active >= self.limit:
+                    self._cond.wait()
+            finally:
+                self.waiting -= 1
+            self.active += 1
+
+    def __exit__(self, *exc) -> None:
+        with self._cond:
+            self.active -= 1
+            self.completed += 1
+            self._cond.notify()
+
+    def adjust_waiting(self, delta: int) -> None:
+        with self._cond:
+            self.waiting += delta
+
+    def resize(self, limit: int) -> None:
+        with self._cond:
+            self.limit = limit
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_concurrent": self.limit,
+                "active": self.active,
+                "waiting": self.waiting,
+                "completed": self.completed,
+            }
+
+
+_gate = _RenderGate(_MAX_CONCURRENT)
+_services: list[_RenderService] = []
+_idle_services: list[_RenderService] = []
+_service_lock = threading.Lock()
+_service_retry_at = 0.0
+_executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+
+def _checkout_service() -> _RenderService:
+    """Take an idle render service from the pool, or start a new one."""
+    with _service_lock:
+        if _idle_services:
+            return _idle_services.pop()
+        if not _services:
+            atexit.register(shutdown_render_service)
+        service = _RenderService()
+        _services.append(service)
+        return service
+
+
+def _checkin_service(service: _RenderService) -> None:
+    with _service_lock:
+        if len(_idle_services) < _gate.limit:
+            _idle_services.append(service)
+            return
+        _services.remove(service)
+    service.stop()  # pool was shrunk while this service was busy
+
+
+def shutdown_render_service() -> None:
+    """Stop every warm render service (they restart on the next export)."""
+    with _service_lock:
+        services = list(_services)
+    for service in services:
+        service.stop()
+
+
+def set_max_concurrent_renders(limit: int) -> None:
+    """Change how many renders (and warm browsers) may run at once."""
+    global _executor  # noqa: PLW0603
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    _gate.resize(limit)
+    with _service_lock:
+        surplus = _idle_services[limit:]
+        del _idle_services[limit:]
+        for service in surplus:
+            _services.remove(service)
+        executor, _executor = _executor, None
+    for service in surplus:
+        service.stop()
+    if executor is not None:
+        executor.shutdown(wait=False)  # queued renders still run
+
+
+def render_queue_stats() -> dict:
+    """Return the concurrency limit and active/waiting/completed render counts.
+
+    ``waiting`` includes ``*_async`` calls queued for a render thread.
+    ``services`` is the number of warm render services in the pool;
+    ``timeouts``, ``restarts`` and ``recycles`` count hung requests, worker
+    crashes and workers retired by ``ATS_PDF_RECYCLE_AFTER`` /
+    ``ATS_PDF_RECYCLE_RSS_MB`` since startup.
+    """
+    stats = _gate.stats()
+    with _service_lock:
+        stats["services"] = len(_services)
+    for name in ("timeouts", "restarts", "recycles"):
+        stats[name] = _counters[name]
+    return stats
+
+
+def _render_oneshot(request: str, jobs: int) -> dict:
+    """Render in a fresh worker process (launches its own Chromium)."""
+    proc = subprocess.Popen(
+        [sys.executable, str(_WORKER), "--once"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        start_new_session=True,
+    )
+    try:
+        stdout, stderr = proc.communicate(
+            request + "\n", timeout=_request_deadline(jobs)
+        )
+    except subprocess.TimeoutExpired:
+        _counters["timeouts"] += 1
+        _kill(proc)
+        raise _RenderTimeout from None
+    lines = stdout.splitlines()
+    if proc.returncode != 0 or len(lines) < 2:
+        error = json.loads(lines[0]).get("error", "") if lines else ""
+        raise PdfRenderError(
+            f"PDF generation failed (exit {proc.returncode}):\n"
+            f"{error or stderr}"
         )
-        if result.returncode != 0:
-            raise RuntimeError(
-                f"PDF generation failed (exit {result.returncode}):\n{result.stderr}"
+    return json.loads(lines[1])
+
+
+def _submit(htmls: list[str], **options) -> tuple[list[bytes], list[dict]]:
+    """Render ``htmls`` on a pooled render service, or the one-shot worker.
+
+    Blocks while ``ATS_PDF_MAX_CONCURRENT`` renders are already running.
+    After the service fails to start, renders go straight to the one-shot
+    worker for ``ATS_PDF_SERVICE_BACKOFF`` seconds.
+    Raises ``PdfRenderError`` on failure or timeout.
+    """
+    global _service_retry_at  # noqa: PLW0603
+    _ensure_chromium()
+    request = _encode_request(htmls, **options)
+    with _gate:
+        try:
+            response = None
+            with _service_lock:
+                use_service = (
+                    _USE_RENDER_SERVICE and time.monotonic() >= _service_retry_at
+                )
+            if use_service:
+                service = _checkout_service()
+                try:
+                    response = service.render(request, len(htmls))
+                except _ServiceUnavailable:
+                    # Don't pay for another failed start on every export.
+                    with _service_lock:
+                        _service_retry_at = time.monotonic() + _SERVICE_BACKOFF
+                finally:
+                    _checkin_service(service)
+            if response is None:
+                response = _render_oneshot(request, len(htmls))
+        except _RenderTimeout:
+            deadline = _request_deadline(len(htmls))
+            raise PdfRenderError(
+                f"Rendering timed out after {deadline:.0f}s",
+                html_size=sum(len(html.encode("utf-8")) for html in htmls),
+                timed_out=True,
+            ) from None
+    return _decode_response(response, htmls)
+
+
+async def run_render_async(fn, *args, **kwargs):
+    """Await ``fn(*args, **kwargs)`` on the render thread pool.
+
+    The pool has one thread per allowed concurrent render, so a burst of
+    async exports queues here without blocking the event loop or tying up
+    asyncio's default executor.
+    """
+    global _executor  # noqa: PLW0603
+
+    def _run():
+        _gate.adjust_waiting(-1)
+        return fn(*args, **kwargs)
+
+    with _service_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=_gate.limit, thread_name_prefix="pdf-render"
             )
-    finally:
-        Path(tmp.name).unlink(missing_ok=True)
+        _gate.adjust_waiting(1)
+        future = _executor.submit(_run)
+    return await asyncio.wrap_future(future)
+
+
+def html_to_pdfs_bytes(
+    htmls: list[str],
+    wait_for_network: bool = False,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
+) -> list[bytes]:
+    """Render several HTML documents to PDF bytes in a single browser session.
+
+    HTML is streamed to the worker over stdin and the PDFs come back over
+    stdout, so nothing is written to disk.  All documents are rendered
+    concurrently on pages of one browser context in the warm render service,
+    so N variants cost one browser launch at most.
+
+    Pages are printed once the DOM has loaded and ``document.fonts.ready``
+    resolves; pass ``wait_for_network=True`` for documents that reference
+    external assets to wait for network idle instead.
+
+    With ``max_pages``, each document is measured against the A4 ``@page``
+    box inside the browser and scaled down (to at most 60%) until it fits
+    that many pages, then printed once.
+
+    With ``optimize``, each PDF is shrunk by the worker's pypdf pass before
+    it is returned, and ``on_report`` is called once per document with
+    ``{"index", "original_bytes", "optimized_bytes", "linearized"}``.
+    """
+    pdfs, reports = _submit(
+        [_inject_page_break_css(html) for html in htmls],
+        wait_for_network=wait_for_network,
+        max_pages=max_pages,
+        optimize=optimize,
+    )
+    if optimize and on_report:
+        for index, report in enumerate(reports):
+            on_report({"index": index, **report})
+    return pdfs
+
+
+def html_to_pdf_bytes(
+    html: str,
+    wait_for_network: bool = False,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
+) -> bytes:
+    """Render HTML to PDF bytes via headless Chromium in a subprocess.
+
+    A subprocess is used so Playwright gets its own event loop, avoiding
+    conflicts with Streamlit's asyncio loop on Windows.  The warm render
+    service is tried first; the one-shot worker is the fallback.
+    """
+    return html_to_pdfs_bytes(
+        [html], wait_for_network, max_pages, optimize, on_report
+    )[0]
+
+
+def html_to_pdf(
+    html: str,
+    output_path: Path,
+    wait_for_network: bool = False,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
+) -> None:
+    """Render HTML to a PDF file (see ``html_to_pdf_bytes``)."""
+    pdf = html_to_pdf_bytes(
+        html, wait_for_network, max_pages, optimize, on_report
+    )
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(pdf)
+
+
+def html_to_pdfs(
+    items: list[tuple[str, Path]],
+    wait_for_network: bool = False,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
+) -> None:
+    """Render several ``(html, output_path)`` pairs in a single browser session."""
+    pdfs = html_to_pdfs_bytes(
+        [html for html, _ in items],
+        wait_for_network,
+        max_pages,
+        optimize,
+        on_report,
+    )
+    for (_, output_path), pdf in zip(items, pdfs):
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_bytes(pdf)
+
+
+def html_to_pngs_bytes(
+    htmls: list[str],
+    scale: float = 0.35,
+    wait_for_network: bool = False,
+) -> list[bytes]:
+    """Screenshot the first A4 page of each HTML document as PNG bytes.
+
+    Uses the same warm browser as PDF export; ``scale`` is the device scale
+    factor, so ``0.35`` yields roughly 278x393 px thumbnails.  The
+    ``@page`` margins are reproduced so thumbnails match the printed PDF.
+    """
+    pngs, _ = _submit(
+        htmls, wait_for_network=wait_for_network, screenshot_scale=scale
+    )
+    return pngs
+
+
+async def html_to_pdf_bytes_async(
+    html: str,
+    wait_for_network: bool = False,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
+) -> bytes:
+    """Async ``html_to_pdf_bytes``, bounded by the global render limit."""
+    return await run_render_async(
+        html_to_pdf_bytes,
+        html,
+        wait_for_network,
+        max_pages,
+        optimize,
+        on_report,
+    )
+
+
+async def html_to_pdf_async(
+    html: str,
+    output_path: Path,
+    wait_for_network: bool = False,
+    max_pages: int | None = None,
+    optimize: bool = False,
+    on_report: Callable[[dict], None] | None = None,
+) -> None:
+    """Async ``html_to_pdf``, bounded by the global render limit."""
+    await run_render_async(
+        html_to_pdf,
+        html,
+        output_path,
+        wait_for_network,
+        max_pages,
+        optimize,
+        on_report,
+    )
@@ -0,0 +1,263 @@
+"""Shared, rate-limit-aware scheduler for OpenAI requests.
+
+Every LLM call in the process goes through ``call_with_retry``, which
+
+* takes a request and an estimated token count from two token buckets
+  (requests and tokens per minute), so concurrent optimizations share the
+  account's budget instead of stampeding it;
+* retries 429s, 408/409s, 5xx responses, timeouts and connection errors
+  with exponential backoff and full jitter, honoring ``retry-after`` /
+  ``retry-after-ms``; a 429 pauses *all* callers until the reset time, not
+  just the one that hit it;
+* learns the account's limits from the ``x-ratelimit-*`` response headers
+  and keeps the buckets in step with the server's ``remaining`` counts.
+
+Limits start from ``ATS_LLM_RPM`` / ``ATS_LLM_TPM`` (``0``, the default,
+means "learn them from the first response"); retries are capped by
+``ATS_LLM_MAX_RETRIES`` (default 6).  Quota-exhausted 429s
+(``insufficient_quota``) and other client errors are raised immediately.
+"""
+
+import os
+import random
+import re
+import threading
+import time
+from typing import Callable, TypeVar
+
+import openai
+
+T = TypeVar("T")
+
+_MAX_RETRIES = int(os.environ.get("ATS_LLM_MAX_RETRIES", "6"))
+_BACKOFF_BASE = 1.0
+_BACKOFF_CAP = 60.0
+
+_RETRYABLE_STATUS = {408, 409, 429}
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _parse_duration(value: str | None) -> float | None:
+    """Parse an ``x-ratelimit-reset-*`` value such as ``1m30s`` or ``250ms``."""
+    if not value:
+        return None
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def _retry_after(headers) -> float | None:
+    if headers is None:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers.get(name)) * scale
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class _TokenBucket:
+    """Continuously refilling per-minute budget shared between threads.
+
+    A ``capacity`` of 0 means unlimited (no limit known yet).  A configured
+    (``pinned``) capacity is kept even if the server reports a higher limit,
+    so a key shared with other services can be given a smaller share.
+    """
+
+    def __init__(self, capacity: float, pinned: bool = False) -> None:
+        self._cond = threading.Condition()
+        self._capacity = capacity
+        self._level = capacity
+        self._stamp = time.monotonic()
+        self._pinned = pinned
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self._capacity:
+            rate = self._capacity / 60.0
+            self._level = min(
+                self._capacity, self._level + (now - self._stamp) * rate
+            )
+        self._stamp = now
+
+    def acquire(self, amount: float) -> float:
+        """Block until ``amount`` is available and take it; return seconds waited."""
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                self._refill()
+                if not self._capacity:
+                    break
+                amount = min(amount, self._capacity)
+                if self._level >= amount:
+                    self._level -= amount
+                    break
+                self._cond.wait(
+                    (amount - self._level) / (self._capacity / 60.0)
+                )
+        return time.monotonic() - started
+
+    def sync(self, limit: float | None, remaining: float | None) -> None:
+        """Adopt the server's limit and never believe in more than it has left."""
+        with self._cond:
+            self._refill()
+            if limit and limit != self._capacity and not self._pinned:
+                self._level = (
+                    self._level * limit / self._capacity
+                    if self._capacity
+                    else limit
+                )
+                self._capacity = limit
+            if remaining is not None and self._capacity:
+                self._level = min(self._level, remaining)
+            self._cond.notify_all()
+
+    @property
+    def capacity(self) -> float:
+        return self._capacity
+
+
+class _Scheduler:
+    def __init__(self, rpm: float, tpm: float) -> None:
+        self.requests = _TokenBucket(rpm, pinned=bool(rpm))
+        self.tokens = _TokenBucket(tpm, pinned=bool(tpm))
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._stats = {
+            "calls": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "waited_s": 0.0,
+        }
+
+    def _pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(
+                self._paused_until, time.monotonic() + seconds
+            )
+
+    def _wait_for_pause(self) -> float:
+        with self._lock:
+            delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+            return delay
+        return 0.0
+
+    def _observe(self, headers) -> None:
+        def _number(name: str) -> float | None:
+            try:
+                return float(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        if headers is None:
+            return
+        self.requests.sync(
+            _number("x-ratelimit-limit-requests"),
+            _number("x-ratelimit-remaining-requests"),
+        )
+        self.tokens.sync(
+            _number("x-ratelimit-limit-tokens"),
+            _number("x-ratelimit-remaining-tokens"),
+        )
+
+    def _count(self, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self._stats[key] += amount
+
+    def call(self, fn: Callable[[], T], estimated_tokens: int) -> T:
+        for attempt in range(_MAX_RETRIES + 1):
+            waited = self._wait_for_pause()
+            waited += self.requests.acquire(1)
+            waited += self.tokens.acquire(estimated_tokens)
+            self._count("waited_s", waited)
+            self._count("calls")
+            rate_limited = False
+            try:
+                raw = fn()
+            except openai.APIStatusError as e:
+                retryable = (
+                    e.status_code in _RETRYABLE_STATUS or e.status_code >= 500
+                ) and getattr(e, "code", None) != "insufficient_quota"
+                if not retryable or attempt == _MAX_RETRIES:
+                    raise
+                headers = e.response.headers
+                self._observe(headers)
+                delay = _retry_after(headers)
+                if e.status_code == 429:
+                    rate_limited = True
+                    self._count("rate_limited")
+                    reset = max(
+                        _parse_duration(
+                            headers.get("x-ratelimit-reset-requests")
+                        ) or 0,
+                        _parse_duration(
+                            headers.get("x-ratelimit-reset-tokens")
+                        ) or 0,
+                    )
+                    delay = delay or reset or None
+            except (openai.APIConnectionError, openai.APITimeoutError):
+                if attempt == _MAX_RETRIES:
+                    raise
+                delay = None
+            else:
+                self._observe(getattr(raw, "headers", None))
+                return raw.parse() if hasattr(raw, "parse") else raw
+
+            if delay is None:
+                # Full jitter: spreads retries of concurrent callers apart.
+                delay = random.uniform(
+                    0, min(_BACKOFF_CAP, _BACKOFF_BASE * 2 ** attempt)
+                )
+            self._count("retries")
+            if rate_limited:
+                # Rate limits are account-wide, so every caller waits it out.
+                self._pause(delay)
+            else:
+                time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["waited_s"] = round(stats["waited_s"], 3)
+        stats["rpm_limit"] = self.requests.capacity
+        stats["tpm_limit"] = self.tokens.capacity
+        return stats
+
+
+_scheduler = _Scheduler(
+    float(os.environ.get("ATS_LLM_RPM", "0")),
+    float(os.environ.get("ATS_LLM_TPM", "0")),
+)
+
+
+def call_with_retry(fn: Callable[[], T], estimated_tokens: int = 0) -> T:
+    """Run ``fn`` under the shared rate limits, retrying transient failures.
+
+    ``fn`` should issue the request through ``with_raw_response`` so the
+    rate-limit headers can be read; its parsed result is returned.
+    """
+    return _scheduler.call(fn, estimated_tokens)
+
+
+def set_rate_limits(rpm: float | None = None, tpm: float | None = None) -> None:
+    """Pin the requests / tokens per minute budget.
+
+    ``0`` returns to learning the limit from response headers; ``None``
+    leaves that budget unchanged.
+    """
+    if rpm is not None:
+        _scheduler.requests = _TokenBucket(rpm, pinned=bool(rpm))
+    if tpm is not None:
+        _scheduler.tokens = _TokenBucket(tpm, pinned=bool(tpm))
+
+
+def scheduler_stats() -> dict:
+    """Return request, retry, rate-limit and wait counters and current limits."""
+    return _scheduler.stats()
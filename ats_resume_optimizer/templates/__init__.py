@@ -92,6 +92,16 @@ def get_template(template_id: str) -> dict:
     return TEMPLATES[template_id]
 
 
+def get_template_version(template_id: str) -> int:
+    """Return the template's ``version`` (default 1); bump it to invalidate caches."""
+    return TEMPLATES[template_id].get("version", 1)
+
+
+def template_uses_network(template_id: str) -> bool:
+    """Return True if the template declares ``external_assets`` (URL fonts/images)."""
+    return bool(TEMPLATES[template_id].get("external_assets", False))
+
+
 def get_template_choices() -> list[tuple[str, str]]:
     return [(tid, t["name"]) for tid, t in TEMPLATES.items()]
 
@@ -0,0 +1,223 @@
+"""Chromium-free export of resume content HTML to plain text, Markdown, or HTML.
+
+The optimizer's content HTML follows ``templates.CONTENT_STRUCTURE``
+(``resume-header``, ``resume-section``, ``item-header``, ``skill-category``,
+...).  This module walks that markup once with BeautifulSoup into a flat list
+of blocks and renders the blocks in the requested format.  It runs in
+milliseconds and needs no browser, so it serves the "paste into the ATS
+form" case and is the fallback when PDF export is unavailable.
+"""
+
+import html
+
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+
+# Block kinds produced by ``_parse`` and consumed by the renderers.
+_NAME, _CONTACT, _HEADING, _ITEM, _SUBTITLE, _BULLET, _PARAGRAPH = range(7)
+
+_CONTAINER_TAGS = {"div", "section", "article", "header", "main", "body"}
+
+
+def _text(el) -> str:
+    """Return the element's text with whitespace collapsed."""
+    return " ".join(el.get_text().split())
+
+
+def _classes(el: Tag) -> set[str]:
+    return set(el.get("class") or [])
+
+
+def _walk(el: Tag, blocks: list[tuple]) -> None:
+    for child in el.children:
+        if isinstance(child, Comment):
+            continue
+        if isinstance(child, NavigableString):
+            text = " ".join(str(child).split())
+            if text:
+                blocks.append((_PARAGRAPH, text))
+            continue
+        if not isinstance(child, Tag):
+            continue
+
+        classes = _classes(child)
+        name = child.name
+        if name == "h1":
+            blocks.append((_NAME, _text(child)))
+        elif "contact-info" in classes:
+            parts = [_text(span) for span in child.find_all("span")]
+            parts = [part for part in parts if part] or [_text(child)]
+            blocks.append((_CONTACT, parts))
+        elif name == "h2":
+            blocks.append((_HEADING, _text(child)))
+        elif "item-header" in classes:
+            title = child.find(["h3", "h4"])
+            date = child.find(class_="date")
+            blocks.append(
+                (
+                    _ITEM,
+                    _text(title) if title else _text(child),
+                    _text(date) if date else "",
+                )
+            )
+        elif name in ("h3", "h4"):
+            blocks.append((_ITEM, _text(child), ""))
+        elif "company" in classes:
+            blocks.append((_SUBTITLE, _text(child)))
+        elif "skill-category" in classes:
+            label = child.find("strong")
+            tags = [_text(tag) for tag in child.find_all(class_="skill-tag")]
+            if tags:
+                prefix = _text(label).rstrip(":") + ": " if label else ""
+                blocks.append((_PARAGRAPH, prefix + ", ".join(tags)))
+            else:
+                blocks.append((_PARAGRAPH, _text(child)))
+        elif name in ("ul", "ol"):
+            for li in child.find_all("li"):
+                text = _text(li)
+                if text:
+                    blocks.append((_BULLET, text))
+        elif name in _CONTAINER_TAGS:
+            _walk(child, blocks)
+        elif name in ("style", "script"):
+            continue
+        else:
+            text = _text(child)
+            if text:
+                blocks.append((_PARAGRAPH, text))
+
+
+def _parse(content_html: str) -> list[tuple]:
+    blocks: list[tuple] = []
+    _walk(BeautifulSoup(content_html, "html.parser"), blocks)
+    return blocks
+
+
+def resume_to_text(content_html: str) -> str:
+    """Render content HTML as ATS-safe plain text (no tables, no columns)."""
+    lines: list[str] = []
+    for block in _parse(content_html):
+        kind = block[0]
+        if kind == _NAME:
+            lines.append(block[1])
+        elif kind == _CONTACT:
+            lines.append(" | ".join(block[1]))
+        elif kind == _HEADING:
+            lines += ["", block[1].upper()]
+        elif kind == _ITEM:
+            lines += ["", " | ".join(part for part in block[1:] if part)]
+        elif kind == _BULLET:
+            lines.append(f"- {block[1]}")
+        else:
+            lines.append(block[1])
+    return "\n".join(lines).strip() + "\n"
+
+
+def _md_escape(text: str) -> str:
+    for char in ("\\", "`", "*", "_", "[", "]"):
+        text = text.replace(char, "\\" + char)
+    return text
+
+
+def resume_to_markdown(content_html: str) -> str:
+    """Render content HTML as Markdown."""
+    lines: list[str] = []
+    previous = None
+    for block in _parse(content_html):
+        kind = block[0]
+        if previous == _BULLET and kind != _BULLET:
+            lines.append("")
+        previous = kind
+        if kind == _NAME:
+            lines += [f"# {_md_escape(block[1])}", ""]
+        elif kind == _CONTACT:
+            lines += [" | ".join(_md_escape(part) for part in block[1]), ""]
+        elif kind == _HEADING:
+            lines += [f"## {_md_escape(block[1])}", ""]
+        elif kind == _ITEM:
+            lines.append(f"### {_md_escape(block[1])}")
+            if block[2]:
+                lines.append(f"*{_md_escape(block[2])}*")
+            lines.append("")
+        elif kind == _SUBTITLE:
+            lines += [f"**{_md_escape(block[1])}**", ""]
+        elif kind == _BULLET:
+            lines.append(f"- {_md_escape(block[1])}")
+        else:
+            lines += [_md_escape(block[1]), ""]
+    text = "\n".join(lines)
+    while "\n\n\n" in text:
+        text = text.replace("\n\n\n", "\n\n")
+    return text.strip() + "\n"
+
+
+def resume_to_html(content_html: str) -> str:
+    """Render content HTML as a minimal, unstyled semantic HTML document."""
+    body: list[str] = []
+    title = ""
+    in_list = False
+    for block in _parse(content_html):
+        kind = block[0]
+        if kind != _BULLET and in_list:
+            body.append("</ul>")
+            in_list = False
+        if kind == _NAME:
+            title = title or block[1]
+            body.append(f"<h1>{html.escape(block[1])}</h1>")
+        elif kind == _CONTACT:
+            body.append(
+                "<p>" + " | ".join(html.escape(part) for part in block[1]) + "</p>"
+            )
+        elif kind == _HEADING:
+            body.append(f"<h2>{html.escape(block[1])}</h2>")
+        elif kind == _ITEM:
+            body.append(f"<h3>{html.escape(block[1])}</h3>")
+            if block[2]:
+                body.append(f"<p><em>{html.escape(block[2])}</em></p>")
+        elif kind == _SUBTITLE:
+            body.append(f"<p><strong>{html.escape(block[1])}</strong></p>")
+        elif kind == _BULLET:
+            if not in_list:
+                body.append("<ul>")
+                in_list = True
+            body.append(f"<li>{html.escape(block[1])}</li>")
+        else:
+            body.append(f"<p>{html.escape(block[1])}</p>")
+    if in_list:
+        body.append("</ul>")
+    return (
+        "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+        f"<title>{html.escape(title or 'Resume')}</title>\n</head>\n<body>\n"
+        + "\n".join(body)
+        + "\n</body>\n</html>\n"
+    )
+
+
+TEXT_FORMATS = {
+    "txt": {
+        "label": "Plain text",
+        "suffix": ".txt",
+        "mime": "text/plain",
+        "render": resume_to_text,
+    },
+    "md": {
+        "label": "Markdown",
+        "suffix": ".md",
+        "mime": "text/markdown",
+        "render": resume_to_markdown,
+    },
+    "html": {
+        "label": "Minimal HTML",
+        "suffix": ".html",
+        "mime": "text/html",
+        "render": resume_to_html,
+    },
+}
+
+
+def render_text(content_html: str, fmt: str = "txt") -> str:
+    """Render content HTML in one of ``TEXT_FORMATS`` (``txt``, ``md``, ``html``)."""
+    if fmt not in TEXT_FORMATS:
+        raise ValueError(
+            f"Unknown text format {fmt!r}; choose from {', '.join(TEXT_FORMATS)}"
+        )
+    return TEXT_FORMATS[fmt]["render"](content_html)
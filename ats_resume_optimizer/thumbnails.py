@@ -0,0 +1,224 @@
+"""Cached PNG thumbnails of every resume template.
+
+Thumbnails are screenshots of a document's first A4 page, taken in the same
+warm browser used for PDF export (``pdf_export.html_to_pngs_bytes``) and
+stored in ``CACHE_DIR / "thumbnails"``.  Each file is keyed by the template
+id and version, the accent color, the content HTML, and the scale, so a
+gallery of all templates loads from disk once it has been built.  Thumbnails
+of ``SAMPLE_CONTENT_HTML`` in the default color are pre-built by
+``python -m ats_resume_optimizer install-browser``.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from ats_resume_optimizer.config import CACHE_DIR
+from ats_resume_optimizer.pdf_export import PdfRenderError, html_to_pngs_bytes
+from ats_resume_optimizer.templates import (
+    TEMPLATES,
+    get_template_version,
+    render_resume,
+    template_uses_network,
+)
+
+_THUMBNAIL_DIR = CACHE_DIR / "thumbnails"
+# Oldest thumbnails beyond this many are evicted (~40 templates per color).
+_MAX_ENTRIES = 600
+
+THUMBNAIL_SCALE = 0.35
+DEFAULT_COLOR = "#2563eb"
+
+SAMPLE_CONTENT_HTML = """\
+<div class="resume-header">
+    <h1>Alexandra Chen</h1>
+    <div class="contact-info">
+        <span>alex.chen@email.com</span>
+        <span>(415) 987-6543</span>
+        <span>San Francisco, CA</span>
+        <span>linkedin.com/in/alexandrachen</span>
+    </div>
+</div>
+<div class="resume-section summary">
+    <h2>Professional Summary</h2>
+    <p>Results-driven Senior Software Engineer with 8+ years of experience building \
+scalable cloud-native applications. Proven track record of leading cross-functional \
+teams and delivering high-impact products that serve millions of users.</p>
+</div>
+<div class="resume-section skills">
+    <h2>Technical Skills</h2>
+    <div class="skills-grid">
+        <div class="skill-category">
+            <strong>Languages:</strong>
+            <span class="skill-tag">Python</span>
+            <span class="skill-tag">TypeScript</span>
+            <span class="skill-tag">Go</span>
+            <span class="skill-tag">SQL</span>
+        </div>
+        <div class="skill-category">
+            <strong>Frameworks:</strong>
+            <span class="skill-tag">React</span>
+            <span class="skill-tag">FastAPI</span>
+            <span class="skill-tag">Next.js</span>
+            <span class="skill-tag">Django</span>
+        </div>
+        <div class="skill-category">
+            <strong>Cloud & DevOps:</strong>
+            <span class="skill-tag">AWS</span>
+            <span class="skill-tag">Docker</span>
+            <span class="skill-tag">Kubernetes</span>
+            <span class="skill-tag">Terraform</span>
+        </div>
+    </div>
+</div>
+<div class="resume-section experience">
+    <h2>Professional Experience</h2>
+    <div class="experience-item">
+        <div class="item-header">
+            <h3>Senior Software Engineer</h3>
+            <span class="date">Jan 2022 – Present</span>
+        </div>
+        <div class="company">Stripe · San Francisco, CA</div>
+        <ul>
+            <li>Led architecture redesign of payment processing pipeline, reducing \
+latency by 40% and handling 2M+ daily transactions.</li>
+            <li>Mentored a team of 5 engineers and established code review standards \
+that cut production bugs by 30%.</li>
+        </ul>
+    </div>
+    <div class="experience-item">
+        <div class="item-header">
+            <h3>Software Engineer</h3>
+            <span class="date">Jun 2019 – Dec 2021</span>
+        </div>
+        <div class="company">Airbnb · San Francisco, CA</div>
+        <ul>
+            <li>Built real-time search ranking service using ML models, improving \
+booking conversion by 18%.</li>
+            <li>Designed and deployed microservices architecture serving 50M+ monthly \
+active users.</li>
+        </ul>
+    </div>
+</div>
+<div class="resume-section education">
+    <h2>Education</h2>
+    <div class="education-item">
+        <div class="item-header">
+            <h3>M.S. Computer Science</h3>
+            <span class="date">2017 – 2019</span>
+        </div>
+        <div class="company">Stanford University · Stanford, CA</div>
+    </div>
+</div>
+<div class="resume-section certifications">
+    <h2>Certifications</h2>
+    <ul class="cert-list">
+        <li><strong>AWS Solutions Architect Professional</strong> – Amazon (2023)</li>
+        <li><strong>Certified Kubernetes Administrator</strong> – CNCF (2022)</li>
+    </ul>
+</div>
+"""
+
+
+def thumbnail_key(
+    template_id: str,
+    color: str,
+    content_html: str = SAMPLE_CONTENT_HTML,
+    scale: float = THUMBNAIL_SCALE,
+) -> str:
+    """Return the cache key for one template thumbnail."""
+    content_hash = hashlib.sha256(content_html.encode("utf-8")).hexdigest()
+    parts = (
+        template_id,
+        str(get_template_version(template_id)),
+        color.lower(),
+        content_hash,
+        str(scale),
+    )
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def _store(key: str, data: bytes) -> None:
+    try:
+        _THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=_THUMBNAIL_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, _THUMBNAIL_DIR / f"{key}.png")
+    except OSError:
+        pass  # best-effort, like the PDF cache
+
+
+def _evict() -> None:
+    entries = []
+    for path in _THUMBNAIL_DIR.glob("*.png"):
+        try:
+            entries.append((path.stat().st_mtime, path))
+        except OSError:
+            continue
+    entries.sort(key=lambda e: e[0])
+    for _, path in entries[: max(0, len(entries) - _MAX_ENTRIES)]:
+        path.unlink(missing_ok=True)
+
+
+def get_thumbnails(
+    color: str = DEFAULT_COLOR,
+    template_ids: list[str] | None = None,
+    content_html: str = SAMPLE_CONTENT_HTML,
+    scale: float = THUMBNAIL_SCALE,
+) -> dict[str, bytes]:
+    """Return ``{template_id: PNG bytes}`` for every template (or ``template_ids``).
+
+    Cached thumbnails are read from disk; the rest are rendered together in
+    one browser session and cached.
+    """
+    template_ids = list(template_ids or TEMPLATES)
+    thumbnails: dict[str, bytes] = {}
+    misses: list[tuple[str, str]] = []
+    for template_id in template_ids:
+        key = thumbnail_key(template_id, color, content_html, scale)
+        path = _THUMBNAIL_DIR / f"{key}.png"
+        try:
+            thumbnails[template_id] = path.read_bytes()
+            os.utime(path)  # mtime doubles as the LRU timestamp
+        except OSError:
+            misses.append((template_id, key))
+
+    for wait_for_network in (False, True):
+        group = [
+            (template_id, key)
+            for template_id, key in misses
+            if template_uses_network(template_id) == wait_for_network
+        ]
+        if not group:
+            continue
+        try:
+            rendered = html_to_pngs_bytes(
+                [
+                    render_resume(template_id, content_html, color)
+                    for template_id, _ in group
+                ],
+                scale,
+                wait_for_network,
+            )
+        except PdfRenderError as e:
+            if e.job_index is not None:
+                e.template_id = group[e.job_index][0]
+            raise
+        for (template_id, key), png in zip(group, rendered):
+            _store(key, png)
+            thumbnails[template_id] = png
+
+    if misses and _THUMBNAIL_DIR.exists():
+        _evict()
+    return {template_id: thumbnails[template_id] for template_id in template_ids}
+
+
+def build_thumbnails(colors: list[str] | None = None) -> int:
+    """Pre-build sample thumbnails of every template for ``colors``.
+
+    Defaults to ``DEFAULT_COLOR``.  Returns the number of thumbnails.
+    """
+    return sum(
+        len(get_thumbnails(color)) for color in (colors or [DEFAULT_COLOR])
+    )
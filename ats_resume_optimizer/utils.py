@@ -13,9 +13,16 @@ def sanitize_for_filename(text: str) -> str:
     )
 
 
-def build_output_path(job_title: str, company: str) -> Path:
-    """Build output PDF path from job title and company."""
+def build_output_path(
+    job_title: str,
+    company: str,
+    variant: str | None = None,
+    suffix: str = ".pdf",
+) -> Path:
+    """Build output path from job title, company, and an optional style variant."""
     title_clean = sanitize_for_filename(job_title.replace(" ", "_"))
     company_clean = sanitize_for_filename(company.replace(" ", "_"))
-    filename = f"{title_clean}_{company_clean}.pdf"
-    return OUTPUT_DIR / filename
+    stem = f"{title_clean}_{company_clean}"
+    if variant:
+        stem += f"_{sanitize_for_filename(variant)}"
+    return OUTPUT_DIR / f"{stem}{suffix}"